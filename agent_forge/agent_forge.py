@@ -9,23 +9,41 @@ Creates:
   - Pattern-specific agent packages (root_agent, sub_agents)
   - __init__.py and agent.py per component, .env from spec
   - main.py, check_env.py, tools/ (from src/)
+  - .forge-manifest.json (content hash per generated file, used by --update)
+
+Every file is rendered in memory first; a new project is written to a staging
+directory and renamed into place, so a failure never leaves a half-built tree.
 
 Usage:
   python agent_forge.py -f project.yaml
   python agent_forge.py -f spec.json --output-dir ./builds
+  python agent_forge.py -f MarginCall.yaml -f PolicyRefiner.yaml
+  python agent_forge.py --specs-dir . --output-dir ./builds --jobs 4
+  python agent_forge.py -f project.yaml --update
+  python agent_forge.py -f project.yaml --dry-run
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import re
+import secrets
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable
 
 import click
 
 AGENT_FORGE_DIR = Path(__file__).resolve().parent
 SRC_DIR = AGENT_FORGE_DIR / "src"
+SPEC_SUFFIXES = (".yaml", ".yml", ".json")
+MANIFEST_NAME = ".forge-manifest.json"
+MANIFEST_VERSION = 1
 
 def _load_yaml(path: Path) -> dict:
     try:
@@ -50,6 +68,9 @@ DEFAULTS = {
     "agent_env": "development",
     "output_dir": ".",
 }
+DEFAULT_MAX_ITERATIONS = 5
+DEFAULT_DESCRIPTION = "A specialist agent."
+BATCH_DEFAULTS = {"batch_chunk_tokens": 20000, "batch_max_shortlist": 10}
 
 
 def load_spec(path: Path) -> dict:
@@ -66,25 +87,108 @@ def load_spec(path: Path) -> dict:
     sub = data["sub_agents"]
     if not isinstance(sub, (list, tuple)) or not sub:
         raise SystemExit("Spec 'sub_agents' must be a non-empty list.")
-    return {**DEFAULTS, **data}
+    need = PATTERN_MIN_SUB_AGENTS.get(data.get("pattern"), 1)
+    if len(sub) < need:
+        raise SystemExit(f"Pattern {data['pattern']!r} needs at least {need} sub_agents, got {len(sub)}.")
+    max_iter = data.get("max_iterations", DEFAULT_MAX_ITERATIONS)
+    if not isinstance(max_iter, int) or isinstance(max_iter, bool) or max_iter < 1:
+        raise SystemExit(f"Spec 'max_iterations' must be a positive integer, got {max_iter!r}.")
+    _check_model_opts("Spec", data)
+    if not isinstance(data.get("lazy_sub_agents", False), bool):
+        raise SystemExit("Spec 'lazy_sub_agents' must be true or false.")
+    if data.get("lazy_sub_agents") and data.get("pattern") in ROOT_TEMPLATES:
+        raise SystemExit(
+            f"Spec 'lazy_sub_agents' only applies to the default coordinator root, not pattern {data['pattern']!r}."
+        )
+    _check_batch_opts(data)
+    tiers = data.get("model_tiers", {})
+    if not isinstance(tiers, dict) or not all(isinstance(v, str) for v in tiers.values()):
+        raise SystemExit("Spec 'model_tiers' must map tier names to model strings.")
+    for tier in tiers:
+        _check_model_opts("Spec 'model_tiers'", {"tier": tier})
+    names, config = _normalize_sub_agents(sub)
+    if data.get("approval_agent") and data["approval_agent"] not in names:
+        raise SystemExit(f"Spec 'approval_agent' {data['approval_agent']!r} is not one of sub_agents.")
+    spec = {**DEFAULTS, **data, "sub_agents": names, "sub_agent_config": config}
+    resolve_components(spec)
+    return spec
+
+
+def _check_batch_opts(data: dict) -> None:
+    """batch_input replaces the coordinator root with BatchScreener -> later stages."""
+    if not isinstance(data.get("batch_input", False), bool):
+        raise SystemExit("Spec 'batch_input' must be true or false.")
+    for key in ("batch_chunk_tokens", "batch_max_shortlist"):
+        value = data.get(key, BATCH_DEFAULTS[key])
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise SystemExit(f"Spec {key!r} must be a positive integer, got {value!r}.")
+    if not data.get("batch_input"):
+        return
+    if data.get("pattern") in ROOT_TEMPLATES or data.get("lazy_sub_agents"):
+        raise SystemExit("Spec 'batch_input' only applies to the default coordinator root, without lazy_sub_agents.")
+    if len(data["sub_agents"]) < 2:
+        raise SystemExit("Spec 'batch_input' needs a screening sub-agent and at least one later stage.")
+
+
+def _check_model_opts(where: str, opts: dict) -> None:
+    for key in ("model", "tier"):
+        if key in opts and not isinstance(opts[key], str):
+            raise SystemExit(f"{where}: {key!r} must be a string, got {opts[key]!r}.")
+    if "tier" in opts and not re.fullmatch(r"[A-Za-z0-9_]+", opts["tier"]):
+        raise SystemExit(f"{where}: tier {opts['tier']!r} may only use letters, digits and '_'.")
+
+
+def _normalize_sub_agents(sub: list) -> tuple[list[str], dict[str, dict]]:
+    """
+    Sub-agents are plain names or mappings with a name plus per-agent options
+    (e.g. routes). Returns (names in spec order, {name: options}).
+    """
+    names: list[str] = []
+    config: dict[str, dict] = {}
+    for entry in sub:
+        if isinstance(entry, str):
+            name, opts = entry, {}
+        elif isinstance(entry, dict) and isinstance(entry.get("name"), str):
+            name, opts = entry["name"], {k: v for k, v in entry.items() if k != "name"}
+        else:
+            raise SystemExit(f"Each sub_agents entry must be a name or a mapping with 'name', got {entry!r}.")
+        if not name.isidentifier():
+            raise SystemExit(f"Sub-agent name must be a valid Python identifier, got {name!r}.")
+        if name in config:
+            raise SystemExit(f"Duplicate sub-agent name: {name!r}")
+        _check_model_opts(f"Sub-agent {name!r}", opts)
+        if not isinstance(opts.get("description", ""), str):
+            raise SystemExit(f"Sub-agent {name!r}: 'description' must be a string.")
+        routes = opts.get("routes", [])
+        if not isinstance(routes, list) or not all(isinstance(r, str) for r in routes):
+            raise SystemExit(f"Sub-agent {name!r}: 'routes' must be a list of regex strings.")
+        for r in routes:
+            try:
+                re.compile(r)
+            except re.error as e:
+                raise SystemExit(f"Sub-agent {name!r}: invalid route pattern {r!r}: {e}") from None
+        names.append(name)
+        config[name] = opts
+    return names, config
 
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def _tree_lines(project_name: str, root_agent: str, sub_agents: list[str]) -> list[str]:
-    """Build tree structure lines for the scaffolded project."""
+def _tree_lines(project_name: str, root_agent: str, sub_agents: list[str], assets: list[str]) -> list[str]:
+    """Build tree structure lines for the scaffolded project (assets: copied src/ paths)."""
     lines = [f"{project_name}/"]
+    lines.append(f"├── {MANIFEST_NAME}")
     lines.append("├── .env")
-    lines.append("├── main.py")
-    lines.append("├── check_env.py")
+    lines.append("├── requirements.txt")
+    for name in ("main.py", "check_env.py", "bench.py"):
+        if name in assets:
+            lines.append(f"├── {name}")
     lines.append("├── tools/")
-    lines.append("│   ├── __init__.py")
-    lines.append("│   ├── config.py")
-    lines.append("│   ├── logging_utils.py")
-    lines.append("│   ├── runner_utils.py")
-    lines.append("│   └── schemas.py")
+    tools = sorted(rel.split("/", 1)[1] for rel in assets if rel.startswith("tools/"))
+    for i, name in enumerate(tools):
+        lines.append(f"│   {'└──' if i == len(tools) - 1 else '├──'} {name}")
     lines.append(f"└── {root_agent}/")
     lines.append("    ├── __init__.py")
     lines.append("    ├── agent.py")
@@ -103,21 +207,46 @@ def _tree_lines(project_name: str, root_agent: str, sub_agents: list[str]) -> li
     return lines
 
 
-def _file_summary(project_name: str, root_agent: str, sub_agents: list[str]) -> list[tuple[str, str]]:
+# copied src/ file -> one-line description, for the file summary
+ASSET_SUMMARIES = {
+    "main.py": "CLI entrypoint: run (--input, --debug, --thoughts, --stream, --timings), daemon, serve, batch, pending, resume.",
+    "check_env.py": "Sanity check: root/sub-agent names, imports, config.",
+    "bench.py": "Offline benchmark: fake model, N requests, framework overhead p50/p99.",
+    "tools/__init__.py": "Package marker for tools.",
+    "tools/config.py": "AI_MODEL, ROOT_AGENT, SUB_AGENTS from .env; resolve_model for per-agent tiers.",
+    "tools/logging_utils.py": "setup_logging, log_event, log_session_state, agent_children, format_agent_flow_for_log, THEME.",
+    "tools/loop_utils.py": "exit_loop tool and ConvergenceGuard for LoopAgent patterns.",
+    "tools/routing.py": "keyword_router: rule-based transfer before the supervisor's model call.",
+    "tools/approvals.py": "request_approval (long-running) and pending-approval records for resume.",
+    "tools/lazy_agents.py": "LazyAgentTool: imports a sub-agent the first time the root calls it.",
+    "tools/daemon.py": "Unix-socket daemon and thin client behind `main.py daemon` / `run`.",
+    "tools/http_server.py": "HTTP front end for `main.py serve`: POST /run, bounded concurrency and queue.",
+    "tools/jsonl_batch.py": "JSONL batch runs for `main.py batch`: bounded concurrency, resumable output.",
+    "tools/batching.py": "BatchScreener: chunked screening of a pasted batch into a shortlist.",
+    "tools/sections.py": "SectionCritic: per-section diff review with cached verdicts.",
+    "tools/timings.py": "Per-run latency breakdown (session create, model, tool, DB append) for `run --timings`.",
+    "tools/runner_utils.py": "execute_agent_stream, build_user_message, APP_NAME, lazy session service (SESSION_BACKEND).",
+    "tools/schemas.py": "Shared Pydantic schemas (ScreeningResult, SectionReview).",
+}
+
+
+def _file_summary(
+    project_name: str,
+    root_agent: str,
+    sub_agents: list[str],
+    pattern: str | None = None,
+    assets: list[str] = (),
+) -> list[tuple[str, str]]:
     """List (path, function) for each scaffolded file."""
     base = f"{project_name}"
     entries: list[tuple[str, str]] = [
+        (f"{base}/{MANIFEST_NAME}", "sha256 per generated file; lets --update keep hand edits."),
         (f"{base}/.env", "Env vars: AGENT_APP_NAME, USER_ID, ROOT_AGENT, SUB_AGENTS, etc."),
-        (f"{base}/main.py", "CLI entrypoint; run agent with --input, --debug, --thoughts."),
-        (f"{base}/check_env.py", "Sanity check: root/sub-agent names, imports, config."),
-        (f"{base}/tools/__init__.py", "Package marker for tools."),
-        (f"{base}/tools/config.py", "AI_MODEL, ROOT_AGENT, SUB_AGENTS from .env; model selection."),
-        (f"{base}/tools/logging_utils.py", "setup_logging, log_event, log_session_state, THEME."),
-        (f"{base}/tools/runner_utils.py", "execute_agent_stream, build_user_message, APP_NAME, session."),
-        (f"{base}/tools/schemas.py", "Shared Pydantic schemas (placeholder)."),
+        (f"{base}/requirements.txt", "Only the packages the included components need."),
+        *((f"{base}/{rel}", ASSET_SUMMARIES.get(rel, "")) for rel in sorted(assets)),
         (f"{base}/{root_agent}/__init__.py", "Exports root_agent."),
-        (f"{base}/{root_agent}/agent.py", "Root LlmAgent + AgentTools for sub-agents."),
-        (f"{base}/{root_agent}/sub_agents/__init__.py", "Exports sub-agents."),
+        (f"{base}/{root_agent}/agent.py", PATTERN_SUMMARIES.get(pattern, "Root LlmAgent + AgentTools for sub-agents.")),
+        (f"{base}/{root_agent}/sub_agents/__init__.py", "Exports sub-agents; each is imported on first access."),
     ]
     for name in sub_agents:
         entries.append((f"{base}/{root_agent}/sub_agents/{name}/__init__.py", f"Exports {name}."))
@@ -125,47 +254,171 @@ def _file_summary(project_name: str, root_agent: str, sub_agents: list[str]) ->
     return entries
 
 
-def _print_success_report(root: Path, spec: dict) -> None:
+def _print_success_report(root: Path, spec: dict, dry_run: bool = False) -> None:
     """Print tree, file summary, and cd + check_env hint."""
     project_name = spec["project_name"]
     root_agent = spec["root_agent"]
     sub_agents = spec["sub_agents"]
+    assets = sorted(selected_assets(spec))
 
     click.echo("\n--- Project tree ---")
-    for line in _tree_lines(project_name, root_agent, sub_agents):
+    for line in _tree_lines(project_name, root_agent, sub_agents, assets):
         click.echo(line)
 
     click.echo("\n--- File summary ---")
-    for path, fn in _file_summary(project_name, root_agent, sub_agents):
+    for path, fn in _file_summary(project_name, root_agent, sub_agents, spec.get("pattern"), assets):
         click.echo(f"  {path} [{fn}]")
 
+    if dry_run:
+        click.echo("\n(dry run: nothing written)")
+        return
     click.echo("\n--- Next steps ---")
     project_root = root.resolve()
     click.echo(f"  cd {project_root}")
-    click.echo("  python check_env.py")
+    click.echo("  pip install -r requirements.txt")
+    if "check_env.py" in assets:
+        click.echo("  python check_env.py")
+    if "bench.py" in assets:
+        click.echo("  python bench.py --requests 20   # framework overhead, no model calls")
 
 
-def copy_core_assets(project_root: Path) -> None:
-    """Copy src/main.py, src/check_env.py, and src/tools/ into project root."""
+@lru_cache(maxsize=1)
+def load_core_assets() -> dict[str, bytes]:
+    """Read src/main.py, src/check_env.py, src/bench.py, and src/tools/ once per process, keyed by project path."""
     if not SRC_DIR.is_dir():
         raise SystemExit(f"Source directory not found: {SRC_DIR}")
-    for name in ("main.py", "check_env.py"):
+    assets: dict[str, bytes] = {}
+    for name in ("main.py", "check_env.py", "bench.py"):
         src = SRC_DIR / name
         if not src.is_file():
             raise SystemExit(f"Source file not found: {src}")
-        shutil.copy2(src, project_root / name)
+        assets[name] = src.read_bytes()
     tools_src = SRC_DIR / "tools"
-    tools_dst = project_root / "tools"
     if not tools_src.is_dir():
         raise SystemExit(f"Source directory not found: {tools_src}")
-    if tools_dst.exists():
-        shutil.rmtree(tools_dst)
-    shutil.copytree(tools_src, tools_dst)
+    for src in sorted(tools_src.rglob("*")):
+        if src.is_file() and "__pycache__" not in src.parts:
+            assets[src.relative_to(SRC_DIR).as_posix()] = src.read_bytes()
+    return assets
+
+
+# Generated-project components, selectable with the spec's include/exclude lists.
+# name -> files from src/ it owns, components it needs, pip requirements it adds.
+# litellm and sessions_db own no files: dropping them makes the shared tools
+# skip those imports (cloud-only model, in-memory sessions).
+COMPONENTS: dict[str, dict] = {
+    "main": {"files": ["main.py"], "needs": ["tools.runner_utils", "tools.daemon", "tools.http_server", "tools.jsonl_batch"], "pip": ["click>=8.1.8,<9.0.0"]},
+    "check_env": {"files": ["check_env.py"], "needs": ["tools.runner_utils"], "pip": []},
+    "bench": {"files": ["bench.py"], "needs": ["tools.runner_utils"], "pip": ["click>=8.1.8,<9.0.0"]},
+    "tools.config": {
+        "files": ["tools/__init__.py", "tools/config.py"],
+        "needs": [],
+        "pip": ["google-adk==1.21.0", "python-dotenv==1.1.1"],
+    },
+    "tools.logging_utils": {"files": ["tools/logging_utils.py"], "needs": [], "pip": ["click>=8.1.8,<9.0.0"]},
+    "tools.runner_utils": {"files": ["tools/runner_utils.py"], "needs": ["tools.config", "tools.logging_utils", "tools.timings"], "pip": []},
+    "tools.timings": {"files": ["tools/timings.py"], "needs": ["tools.logging_utils"], "pip": []},
+    "tools.schemas": {"files": ["tools/schemas.py"], "needs": [], "pip": ["pydantic==2.11.9"]},
+    "tools.loop_utils": {"files": ["tools/loop_utils.py"], "needs": [], "pip": []},
+    "tools.routing": {"files": ["tools/routing.py"], "needs": [], "pip": []},
+    "tools.approvals": {"files": ["tools/approvals.py"], "needs": ["sessions_db"], "pip": []},
+    "tools.lazy_agents": {"files": ["tools/lazy_agents.py"], "needs": [], "pip": []},
+    "tools.daemon": {"files": ["tools/daemon.py"], "needs": ["tools.config"], "pip": []},
+    "tools.http_server": {"files": ["tools/http_server.py"], "needs": ["tools.logging_utils"], "pip": []},
+    "tools.jsonl_batch": {"files": ["tools/jsonl_batch.py"], "needs": [], "pip": []},
+    "tools.batching": {"files": ["tools/batching.py"], "needs": ["tools.schemas", "tools.loop_utils"], "pip": []},
+    "tools.sections": {"files": ["tools/sections.py"], "needs": ["tools.schemas", "tools.loop_utils"], "pip": []},
+    "litellm": {"files": [], "needs": [], "pip": ["litellm>=1.66.3"]},
+    "sessions_db": {"files": [], "needs": [], "pip": ["sqlalchemy>=2.0", "aiosqlite", "greenlet>=3.3.1"]},
+}
+
+# include/exclude shorthands
+COMPONENT_GROUPS = {
+    "tools": ["tools.config", "tools.logging_utils", "tools.runner_utils", "tools.schemas"],
+}
 
+# used when the spec has no include list
+DEFAULT_COMPONENTS = ["main", "check_env", "bench", "tools", "litellm", "sessions_db"]
 
-def write(p: Path, content: str) -> None:
+# every generated agent imports tools.config
+REQUIRED_COMPONENTS = ["tools.config"]
+
+# pattern -> tools modules its generated agents import
+PATTERN_COMPONENTS = {
+    "iterative_refinement": ["tools.loop_utils"],
+    "generator_critic": ["tools.sections"],
+    "supervisor_routing": ["tools.routing"],
+    "human_in_the_loop": ["tools.approvals"],
+}
+
+
+def _expand_components(names: list[str], where: str) -> set[str]:
+    out: set[str] = set()
+    for name in names:
+        if name in COMPONENT_GROUPS:
+            out.update(COMPONENT_GROUPS[name])
+        elif name in COMPONENTS:
+            out.add(name)
+        else:
+            known = sorted([*COMPONENTS, *COMPONENT_GROUPS])
+            raise SystemExit(f"Unknown component {name!r} in spec '{where}'. Known: {', '.join(known)}")
+    return out
+
+
+def resolve_components(spec: dict) -> set[str]:
+    """
+    Components to generate: include (default DEFAULT_COMPONENTS) plus what the
+    pattern and every agent need, minus exclude. Excluding something that an
+    included component needs is an error rather than a broken project.
+    """
+    for key in ("include", "exclude"):
+        if not isinstance(spec.get(key, []), list):
+            raise SystemExit(f"Spec {key!r} must be a list of component names.")
+    selected = _expand_components(spec.get("include") or DEFAULT_COMPONENTS, "include")
+    excluded = _expand_components(spec.get("exclude", []), "exclude")
+    forced = {*REQUIRED_COMPONENTS, *PATTERN_COMPONENTS.get(spec.get("pattern"), [])}
+    if spec.get("lazy_sub_agents"):
+        forced.add("tools.lazy_agents")
+    if spec.get("batch_input"):
+        forced.add("tools.batching")
+    selected = (selected - excluded) | forced
+
+    pending = list(selected)
+    while pending:
+        name = pending.pop()
+        for dep in COMPONENTS[name]["needs"]:
+            if dep in excluded:
+                raise SystemExit(f"Component {name!r} needs {dep!r}, which the spec excludes.")
+            if dep not in selected:
+                selected.add(dep)
+                pending.append(dep)
+    if excluded & forced:
+        raise SystemExit(f"Cannot exclude {sorted(excluded & forced)}: required by every project or by the pattern.")
+    return selected
+
+
+def selected_assets(spec: dict) -> dict[str, bytes]:
+    """Core assets owned by the spec's components."""
+    assets = load_core_assets()
+    owned = {f for c in COMPONENTS.values() for f in c["files"]}
+    unowned = sorted(set(assets) - owned)
+    if unowned:
+        raise SystemExit(f"src/ files not assigned to any component in COMPONENTS: {unowned}")
+    wanted = {f for name in resolve_components(spec) for f in COMPONENTS[name]["files"]}
+    return {rel: content for rel, content in assets.items() if rel in wanted}
+
+
+def requirements_content(spec: dict) -> str:
+    reqs = {r for name in resolve_components(spec) for r in COMPONENTS[name]["pip"]}
+    return "".join(f"{r}\n" for r in sorted(reqs, key=str.lower))
+
+
+def write(p: Path, content: str | bytes) -> None:
     ensure_dir(p.parent)
-    p.write_text(content, encoding="utf-8")
+    if isinstance(content, bytes):
+        p.write_bytes(content)
+    else:
+        p.write_text(content, encoding="utf-8")
 
 
 def root_init(root_agent: str) -> str:
@@ -175,28 +428,73 @@ __all__ = ["root_agent"]
 '''
 
 
-def root_agent_py(spec: dict) -> str:
+def output_key(name: str) -> str:
+    """State key a generated sub-agent writes its final answer to."""
+    return f"{name}_output"
+
+
+def _state_inputs(names: list[str]) -> str:
+    """Instruction lines that pull earlier agents' outputs from session state."""
+    return "\n    ".join(f"- {n}: {{{output_key(n)}?}}" for n in names)
+
+
+def _sub_imports(subs: list[str]) -> str:
+    return "\n".join(f"from .sub_agents.{s} import {s}" for s in subs)
+
+
+def _model_expr(model: str | None = None, tier: str | None = None) -> tuple[str, str]:
+    """(name imported from tools.config, model= expression) for an agent's model/tier."""
+    if model:
+        return "resolve_model", f"resolve_model(model={json.dumps(model)})"
+    if tier:
+        return "resolve_model", f"resolve_model(tier={json.dumps(tier)})"
+    return "AI_MODEL", "AI_MODEL"
+
+
+def _root_model_expr(spec: dict) -> tuple[str, str]:
+    """Root (and inline gather) model from the spec's top-level model/tier keys."""
+    return _model_expr(spec.get("model"), spec.get("tier"))
+
+
+def _description(spec: dict, name: str) -> str:
+    return spec.get("sub_agent_config", {}).get(name, {}).get("description", DEFAULT_DESCRIPTION)
+
+
+def _coordinator_root_py(spec: dict) -> str:
+    """
+    Default: one LlmAgent that calls every sub-agent through AgentTool.
+    With lazy_sub_agents, LazyAgentTool instead: sub-agents import on first call.
+    """
     root = spec["root_agent"]
     subs = spec["sub_agents"]
-    sub_imports = "\n".join(f"from .sub_agents.{s} import {s}" for s in subs)
-    tool_list = ",\n        ".join(f"AgentTool(agent={s})" for s in subs)
+    if spec.get("lazy_sub_agents"):
+        adk_tool_import = ""
+        sub_imports = "from tools.lazy_agents import LazyAgentTool"
+        tool_list = ",\n        ".join(
+            f"LazyAgentTool(package=__package__, name={json.dumps(s)}, description={json.dumps(_description(spec, s))})"
+            for s in subs
+        )
+    else:
+        adk_tool_import = "\nfrom google.adk.tools import AgentTool"
+        sub_imports = _sub_imports(subs)
+        tool_list = ",\n        ".join(f"AgentTool(agent={s})" for s in subs)
     tools_desc = "\n    ".join(f"- {s}: ..." for s in subs)
+    model_import, model = _root_model_expr(spec)
     return f'''"""
 {root} – supervisor/root agent
 """
 
-from google.adk.agents import LlmAgent
-from google.adk.tools import AgentTool
+from google.adk.agents import LlmAgent{adk_tool_import}
 from google.adk.planners.built_in_planner import BuiltInPlanner
 from google.genai import types
 
-from tools.config import AI_MODEL, INCLUDE_THOUGHTS
+from tools.config import {model_import}, INCLUDE_THOUGHTS
 {sub_imports}
 
 # For consistency, python variable and agent name are identical
 root_agent = LlmAgent(
     name="{root}",
-    model=AI_MODEL,
+    model={model},
     generate_content_config=types.GenerateContentConfig(
         temperature=0.5,
         max_output_tokens=1000,
@@ -217,12 +515,520 @@ root_agent = LlmAgent(
 '''
 
 
+def _sequential_root_py(spec: dict) -> str:
+    """sequential_pipeline: run sub-agents in spec order, each reading the previous output."""
+    root = spec["root_agent"]
+    subs = spec["sub_agents"]
+    steps = ",\n        ".join(subs)
+    return f'''"""
+{root} – sequential pipeline: {" -> ".join(subs)}
+"""
+
+from google.adk.agents import SequentialAgent
+
+{_sub_imports(subs)}
+
+# For consistency, python variable and agent name are identical
+root_agent = SequentialAgent(
+    name="{root}",
+    description="Runs each step in order; every step writes its result to session state.",
+    sub_agents=[
+        {steps},
+    ],
+)
+'''
+
+
+def _parallel_then_synthesize_root_py(spec: dict) -> str:
+    """sequential_parallel_then_synthesize: ParallelAgent(fetchers), then the last sub-agent synthesizes."""
+    root = spec["root_agent"]
+    *fetchers, synthesizer = spec["sub_agents"]
+    branches = ",\n                ".join(fetchers)
+    return f'''"""
+{root} – parallel fetch, then synthesize: ({" || ".join(fetchers)}) -> {synthesizer}
+"""
+
+from google.adk.agents import ParallelAgent, SequentialAgent
+
+{_sub_imports(spec["sub_agents"])}
+
+# For consistency, python variable and agent name are identical
+root_agent = SequentialAgent(
+    name="{root}",
+    description="Fetches all inputs concurrently, then synthesizes one answer.",
+    sub_agents=[
+        ParallelAgent(
+            name="{root}_fetch",
+            description="Independent fetchers; each writes its own output_key.",
+            sub_agents=[
+                {branches},
+            ],
+        ),
+        {synthesizer},
+    ],
+)
+'''
+
+
+def _parallel_merge_root_py(
+    spec: dict,
+    *,
+    arrow: str,
+    parallel: str,
+    parallel_description: str | None,
+    merge: str,
+    merge_description: str,
+    temperature: float,
+    max_output_tokens: int,
+    instruction: tuple[str, ...],
+    root_description: str,
+    isolated: bool = False,
+) -> str:
+    """
+    SequentialAgent(ParallelAgent(all sub-agents) named root_<parallel>, then an
+    inline merge LlmAgent named root_<merge> reading their output keys).
+    isolated: the merge agent gets no history and cannot transfer.
+    """
+    root = spec["root_agent"]
+    subs = spec["sub_agents"]
+    branches = ",\n                ".join(subs)
+    model_import, model = _root_model_expr(spec)
+    isolation_comment = (
+        "# Lightweight: no tools, no transfers, and no conversation history; it only\n"
+        "# sees the branch outputs interpolated from session state.\n"
+        if isolated
+        else ""
+    )
+    isolation_args = (
+        '    include_contents="none",\n    disallow_transfer_to_parent=True,\n    disallow_transfer_to_peers=True,\n'
+        if isolated
+        else ""
+    )
+    parallel_desc = f'            description="{parallel_description}",\n' if parallel_description else ""
+    instruction_text = "\n    ".join(instruction)
+    return f'''"""
+{root} – {arrow}: ({" || ".join(subs)}) -> {root}_{merge}
+"""
+
+from google.adk.agents import LlmAgent, ParallelAgent, SequentialAgent
+from google.genai import types
+
+from tools.config import {model_import}
+{_sub_imports(subs)}
+
+{isolation_comment}{root}_{merge} = LlmAgent(
+    name="{root}_{merge}",
+    model={model},
+    generate_content_config=types.GenerateContentConfig(
+        temperature={temperature},
+        max_output_tokens={max_output_tokens},
+    ),
+    description="{merge_description}",
+{isolation_args}    instruction="""
+    {instruction_text}
+    {_state_inputs(subs)}
+    """,
+)
+
+# For consistency, python variable and agent name are identical
+root_agent = SequentialAgent(
+    name="{root}",
+    description="{root_description}",
+    sub_agents=[
+        ParallelAgent(
+            name="{root}_{parallel}",
+{parallel_desc}            sub_agents=[
+                {branches},
+            ],
+        ),
+        {root}_{merge},
+    ],
+)
+'''
+
+
+def _fanout_gather_root_py(spec: dict) -> str:
+    """parallel_fanout_gather: ParallelAgent(all sub-agents), then an inline gather LlmAgent."""
+    return _parallel_merge_root_py(
+        spec,
+        arrow="parallel fan-out / gather",
+        parallel="fanout",
+        parallel_description=None,
+        merge="gather",
+        merge_description="Merges the specialists' results into one answer.",
+        temperature=0.5,
+        max_output_tokens=1000,
+        instruction=(
+            "You are the gather step. Combine the specialists' results below into a single",
+            "response for the user. Do not call any tools.",
+        ),
+        root_description="Fans out to every specialist concurrently, then gathers.",
+    )
+
+
+def _delegation_root_py(spec: dict) -> str:
+    """
+    llm_delegation_only: independent LLM branches run concurrently, then a
+    composer merges their state keys. Latency = slowest branch + one small call.
+    """
+    return _parallel_merge_root_py(
+        spec,
+        arrow="concurrent delegation",
+        parallel="branches",
+        parallel_description="Independent delegates; each writes its own output_key.",
+        merge="composer",
+        merge_description="Merges the branch outputs into one response.",
+        temperature=0.3,
+        max_output_tokens=800,
+        instruction=(
+            "Compose one concise response for the user from the sections below.",
+            "Keep each section's facts; do not add new ones. Skip empty sections.",
+        ),
+        root_description="Runs every delegate concurrently, then composes their outputs.",
+        isolated=True,
+    )
+
+
+def _loop_root_py(spec: dict) -> str:
+    """iterative_refinement: LoopAgent(drafter, ConvergenceGuard, ..., checker with exit_loop)."""
+    root = spec["root_agent"]
+    drafter, *rest = spec["sub_agents"]
+    max_iterations = spec.get("max_iterations", DEFAULT_MAX_ITERATIONS)
+    steps = ",\n        ".join(
+        [drafter, f'ConvergenceGuard(name="{root}_converged", watch_key="{output_key(drafter)}")', *rest]
+    )
+    return f'''"""
+{root} – iterative refinement loop: {" -> ".join(spec["sub_agents"])}
+
+Stops on the first of: {rest[-1]} calls exit_loop, {drafter}'s output is
+unchanged from the previous round, or max_iterations rounds.
+"""
+
+from google.adk.agents import LoopAgent
+
+from tools.loop_utils import ConvergenceGuard
+{_sub_imports(spec["sub_agents"])}
+
+# For consistency, python variable and agent name are identical
+root_agent = LoopAgent(
+    name="{root}",
+    description="Draft, check, refine until the checker passes the draft.",
+    max_iterations={max_iterations},
+    sub_agents=[
+        {steps},
+    ],
+)
+'''
+
+
+def _generator_critic_root_py(spec: dict) -> str:
+    """generator_critic: LoopAgent(generator, ..., SectionCritic(critic)); the critic sees changed sections only."""
+    root = spec["root_agent"]
+    generator, *middle, critic = spec["sub_agents"]
+    max_iterations = spec.get("max_iterations", DEFAULT_MAX_ITERATIONS)
+    review = (
+        f'SectionCritic(\n            name="{root}_review",\n'
+        f'            draft_key="{output_key(generator)}",\n'
+        f"            sub_agents=[{critic}],\n        )"
+    )
+    steps = ",\n        ".join([generator, *middle, review])
+    return f'''"""
+{root} – generator/critic loop: {" -> ".join(spec["sub_agents"])}
+
+{critic} reviews only the sections of {generator}'s draft that changed since
+their last review; unchanged sections keep their cached verdict. Stops when
+every section passes, when a revision changes nothing new, or after
+max_iterations rounds.
+"""
+
+from google.adk.agents import LoopAgent
+
+from tools.sections import SectionCritic
+{_sub_imports(spec["sub_agents"])}
+
+# For consistency, python variable and agent name are identical
+root_agent = LoopAgent(
+    name="{root}",
+    description="Generate, critique changed sections, revise until every section passes.",
+    max_iterations={max_iterations},
+    sub_agents=[
+        {steps},
+    ],
+)
+'''
+
+
+def _router_root_py(spec: dict) -> str:
+    """supervisor_routing: LlmAgent that transfers to sub-agents, with a rule pre-router."""
+    root = spec["root_agent"]
+    subs = spec["sub_agents"]
+    config = spec.get("sub_agent_config", {})
+    route_lines = []
+    for s in subs:
+        patterns = config.get(s, {}).get("routes", [])
+        if not patterns:
+            route_lines.append(f"    {json.dumps(s)}: [],")
+            continue
+        route_lines.append(f"    {json.dumps(s)}: [")
+        route_lines.extend(f"        {json.dumps(r, ensure_ascii=False)}," for r in patterns)
+        route_lines.append("    ],")
+    routes = "\n".join(route_lines)
+    agents_desc = "\n    ".join(f"- {s}: ..." for s in subs)
+    sub_list = ",\n        ".join(subs)
+    model_import, model = _root_model_expr(spec)
+    return f'''"""
+{root} – supervisor with rule-based pre-routing
+
+Requests matching a sub-agent's `routes:` patterns (from the spec) transfer
+straight to that sub-agent; only unmatched requests cost a routing model call.
+"""
+
+from google.adk.agents import LlmAgent
+from google.adk.planners.built_in_planner import BuiltInPlanner
+from google.genai import types
+
+from tools.config import {model_import}, INCLUDE_THOUGHTS
+from tools.routing import keyword_router
+{_sub_imports(subs)}
+
+# sub-agent -> case-insensitive regex; first match wins
+ROUTES = {{
+{routes}
+}}
+
+# For consistency, python variable and agent name are identical
+root_agent = LlmAgent(
+    name="{root}",
+    model={model},
+    generate_content_config=types.GenerateContentConfig(
+        temperature=0.5,
+        max_output_tokens=1000,
+    ),
+    planner=BuiltInPlanner(
+        thinking_config=types.ThinkingConfig(include_thoughts=INCLUDE_THOUGHTS)
+    ),
+    instruction="""
+    You are a supervisor agent. Transfer the user's request to the single best specialist:
+    {agents_desc}
+    """,
+    sub_agents=[
+        {sub_list},
+    ],
+    before_model_callback=keyword_router(ROUTES),
+)
+'''
+
+
+def approval_agent(spec: dict) -> str:
+    """The human_in_the_loop gate: spec 'approval_agent', else the first *approval* sub-agent, else the second to last."""
+    subs = spec["sub_agents"]
+    if spec.get("approval_agent"):
+        return spec["approval_agent"]
+    return next((s for s in subs if "approval" in s), subs[-2])
+
+
+def _batch_root_py(spec: dict) -> str:
+    """batch_input: BatchScreener(first sub-agent) over chunks of the batch, then the rest on the shortlist."""
+    root = spec["root_agent"]
+    screener, *stages = spec["sub_agents"]
+    chunk_tokens = spec.get("batch_chunk_tokens", BATCH_DEFAULTS["batch_chunk_tokens"])
+    max_shortlist = spec.get("batch_max_shortlist", BATCH_DEFAULTS["batch_max_shortlist"])
+    stage_list = ",\n        ".join(stages)
+    return f'''"""
+{root} – batch pipeline: {root}_screen({screener}, per chunk) -> {" -> ".join(stages)}
+
+Paste one candidate or many (separated by lines of '---', or a JSON list).
+Later stages see only the shortlist, never the whole batch.
+"""
+
+from google.adk.agents import SequentialAgent
+
+from tools.batching import BatchScreener
+{_sub_imports(spec["sub_agents"])}
+
+# For consistency, python variable and agent name are identical
+root_agent = SequentialAgent(
+    name="{root}",
+    description="Screens a batch in context-sized chunks, then evaluates the shortlist stage by stage.",
+    sub_agents=[
+        BatchScreener(
+            name="{root}_screen",
+            description="Runs {screener} once per chunk and merges the shortlists.",
+            chunk_tokens={chunk_tokens},  # per chunk, ~4 characters per token
+            max_shortlist={max_shortlist},
+            sub_agents=[{screener}],
+        ),
+        {stage_list},
+    ],
+)
+'''
+
+
+def _approval_root_py(spec: dict) -> str:
+    """human_in_the_loop: SequentialAgent that pauses at the approval gate until `main.py resume`."""
+    root = spec["root_agent"]
+    subs = spec["sub_agents"]
+    gate = approval_agent(spec)
+    steps = ",\n        ".join(subs)
+    return f'''"""
+{root} – human-in-the-loop pipeline: {" -> ".join(subs)}
+
+{gate} calls request_approval (long-running); the resumable App pauses the
+invocation there and records it under pending_approvals/. Nothing is held in
+memory while waiting. Continue with:
+    python main.py resume --session <id> --approve   (or --reject)
+Agents after the gate only run once a human approved.
+"""
+
+from google.adk.agents import SequentialAgent
+
+{_sub_imports(subs)}
+
+# For consistency, python variable and agent name are identical
+root_agent = SequentialAgent(
+    name="{root}",
+    description="Propose, wait for human approval, then execute.",
+    sub_agents=[
+        {steps},
+    ],
+)
+'''
+
+
+# pattern -> root agent.py template; unknown patterns get the AgentTool coordinator
+ROOT_TEMPLATES: dict[str, Callable[[dict], str]] = {
+    "sequential_pipeline": _sequential_root_py,
+    "sequential_parallel_then_synthesize": _parallel_then_synthesize_root_py,
+    "parallel_fanout_gather": _fanout_gather_root_py,
+    "llm_delegation_only": _delegation_root_py,
+    "iterative_refinement": _loop_root_py,
+    "generator_critic": _generator_critic_root_py,
+    "supervisor_routing": _router_root_py,
+    "human_in_the_loop": _approval_root_py,
+}
+
+# pattern -> minimum number of sub_agents its template needs
+PATTERN_MIN_SUB_AGENTS = {
+    "sequential_parallel_then_synthesize": 2,
+    "iterative_refinement": 2,
+    "generator_critic": 2,
+    "human_in_the_loop": 2,
+}
+
+# patterns whose App must be resumable (AGENT_RESUMABLE in .env)
+RESUMABLE_PATTERNS = {"human_in_the_loop"}
+
+# pattern -> one-line description of the generated root, for the file summary
+PATTERN_SUMMARIES = {
+    "sequential_pipeline": "Root SequentialAgent over the sub-agents, in spec order.",
+    "sequential_parallel_then_synthesize": "Root SequentialAgent(ParallelAgent(fetchers), synthesizer).",
+    "parallel_fanout_gather": "Root SequentialAgent(ParallelAgent(sub-agents), gather LlmAgent).",
+    "llm_delegation_only": "Root SequentialAgent(ParallelAgent(delegates), history-free composer LlmAgent).",
+    "iterative_refinement": "Root LoopAgent(drafter, ConvergenceGuard, checker) with max_iterations.",
+    "generator_critic": "Root LoopAgent(generator, SectionCritic(critic)); critic sees changed sections only.",
+    "supervisor_routing": "Root LlmAgent transferring to sub-agents; keyword_router skips the model on rule hits.",
+    "human_in_the_loop": "Root SequentialAgent; pauses at the approval gate until `main.py resume`.",
+}
+
+
+def root_agent_py(spec: dict) -> str:
+    if spec.get("batch_input"):
+        return _batch_root_py(spec)
+    return ROOT_TEMPLATES.get(spec.get("pattern"), _coordinator_root_py)(spec)
+
+
+def sub_agent_options(spec: dict) -> dict[str, dict]:
+    """Map sub-agent -> sub_agent_py() keyword arguments its role in the pattern needs."""
+    pattern = spec.get("pattern")
+    subs = spec["sub_agents"]
+    if spec.get("batch_input"):
+        # Every stage starts from its own state inputs, not the pasted batch.
+        screener, first, *_ = subs
+        skip = [("before_agent_callback", "tools.batching", "require_shortlist")]
+        options = {
+            cur: {"inputs": [prev], "include_contents": "none", "callbacks": skip}
+            for prev, cur in zip(subs[1:], subs[2:])
+        }
+        options[screener] = {
+            "include_contents": "none",
+            "output_schema": ("tools.schemas", "ScreeningResult"),
+            "notes": "Screen each candidate below against the role. Shortlist only strong fits,\n"
+            "    using the id in brackets; leave the shortlist empty if none fit.\n\n"
+            "    Candidates:\n    {batch_chunk}",
+        }
+        options[first] = {
+            "include_contents": "none",
+            "callbacks": skip,
+            "notes": "Evaluate each shortlisted candidate below in depth.\n\n"
+            "    Shortlisted candidates:\n    {shortlisted_candidates?}",
+        }
+        return options
+    if pattern == "sequential_pipeline":
+        return {cur: {"inputs": [prev]} for prev, cur in zip(subs, subs[1:])}
+    if pattern == "sequential_parallel_then_synthesize":
+        return {subs[-1]: {"inputs": subs[:-1]}}
+    if pattern == "iterative_refinement":
+        drafter, checker = subs[0], subs[-1]
+        options = {cur: {"inputs": [prev]} for prev, cur in zip(subs, subs[1:])}
+        options[drafter] = {
+            "inputs": [checker],
+            "notes": "Revise your previous draft to address every finding from the checker, if any.",
+        }
+        options[checker] = {
+            "inputs": options.get(checker, {}).get("inputs", []),
+            "tools": [("tools.loop_utils", "exit_loop")],
+            "notes": "If the draft passes every check, call exit_loop and nothing else.\n"
+            "    Otherwise list the specific findings the drafter must fix.",
+        }
+        return options
+    if pattern == "generator_critic":
+        generator, critic = subs[0], subs[-1]
+        options = {cur: {"inputs": [prev]} for prev, cur in zip(subs, subs[1:-1])}
+        options[generator] = {
+            "notes": "Write the complete document in markdown, one '## ' heading per section.\n"
+            "    Keep headings stable between revisions and change only sections with findings.\n\n"
+            "    Open findings from the last review:\n    {review_findings?}",
+        }
+        options[critic] = {
+            "include_contents": "none",
+            "output_schema": ("tools.schemas", "SectionReview"),
+            "notes": "Review only the changed sections below for completeness, safety, and clarity.\n"
+            "    Return one verdict per changed section, using its exact heading.\n\n"
+            "    Changed sections:\n    {changed_sections}\n\n"
+            "    Unchanged sections (already reviewed; for context only):\n    {unchanged_verdicts?}",
+        }
+        return options
+    if pattern == "human_in_the_loop":
+        gate = approval_agent(spec)
+        after = subs[subs.index(gate) + 1 :]
+        options = {cur: {"inputs": [prev]} for prev, cur in zip(subs, subs[1:])}
+        options[gate] = {
+            **options.get(gate, {}),
+            "tools": [("tools.approvals", "request_approval_tool")],
+            "notes": "Call request_approval once with a summary of the proposal (amount, payee, reason).\n"
+            "    When the decision comes back, report it; never approve anything yourself.",
+        }
+        for name in after:
+            options[name] = {
+                **options.get(name, {}),
+                "callbacks": [("before_agent_callback", "tools.approvals", "require_approval")],
+            }
+        return options
+    return {}
+
+
 def sub_agents_init(sub_agents: list[str]) -> str:
-    imports = "\n".join(f"from .{s} import {s}" for s in sub_agents)
+    """Lazy exports: a sub-agent module is imported the first time it is accessed."""
     all_ = ", ".join(f'"{s}"' for s in sub_agents)
-    return f'''{imports}
+    return f'''from importlib import import_module
 
 __all__ = [{all_}]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return getattr(import_module(f".{{name}}", __name__), name)
+    raise AttributeError(f"module {{__name__!r}} has no attribute {{name!r}}")
 '''
 
 
@@ -233,25 +1039,62 @@ __all__ = ["{name}"]
 '''
 
 
-def sub_agent_py(name: str) -> str:
+def sub_agent_py(
+    name: str,
+    inputs: list[str] | tuple[str, ...] = (),
+    tools: list[tuple[str, str]] | tuple = (),
+    notes: str = "",
+    callbacks: list[tuple[str, str, str]] | tuple = (),
+    model: str | None = None,
+    tier: str | None = None,
+    description: str = DEFAULT_DESCRIPTION,
+    output_schema: tuple[str, str] | None = None,
+    include_contents: str | None = None,
+) -> str:
+    """
+    inputs: upstream agents read from state; tools: (module, function) pairs;
+    notes: extra instruction; callbacks: (LlmAgent kwarg, module, function);
+    model/tier: per-agent model, resolved by tools.config.resolve_model;
+    description: what the agent does, shown to the model that delegates to it;
+    output_schema: (module, class) for structured output; include_contents: "none"
+    to start from state inputs instead of the conversation.
+    """
+    model_import, model_arg = _model_expr(model, tier)
+    reads = ""
+    if notes:
+        reads += f"\n\n    {notes}"
+    if inputs:
+        reads += f"""
+
+    Inputs from earlier steps:
+    {_state_inputs(list(inputs))}"""
+    schema = [output_schema] if output_schema else []
+    tool_imports = "".join(
+        f"\nfrom {mod} import {fn}" for mod, fn in [*tools, *((m, f) for _, m, f in callbacks), *schema]
+    )
+    tool_list = f"\n    include_contents={json.dumps(include_contents)}," if include_contents else ""
+    tool_list += f"\n    tools=[{', '.join(fn for _, fn in tools)}]," if tools else ""
+    tool_list += "".join(f"\n    {kwarg}={fn}," for kwarg, _, fn in callbacks)
+    tool_list += f"\n    output_schema={output_schema[1]}," if output_schema else ""
     return f'''"""
 {name} – sub-agent (placeholder).
 """
 
 from google.adk.agents import LlmAgent
 
-from tools.config import AI_MODEL
+from tools.config import {model_import}{tool_imports}
 
 # For consistency, python variable and agent name are identical
 {name} = LlmAgent(
     name="{name}",
-    model=AI_MODEL,
-    description="A specialist agent.",
+    model={model_arg},
+    description={json.dumps(description)},
     instruction="""
     You are a placeholder for the {name} agent.
     Currently under construction.
-    Acknowledge the user's request and state that you cannot process it yet.
-    """,
+    Acknowledge the user's request and state that you cannot process it yet.{reads}
+    """,{tool_list}
+    output_key="{output_key(name)}",
 )
 '''
 
@@ -262,61 +1105,354 @@ def env_content(spec: dict) -> str:
     subs = ",".join(spec["sub_agents"])
     uid = spec.get("user_id", DEFAULTS["user_id"])
     env = spec.get("agent_env", DEFAULTS["agent_env"])
-    return f'''AGENT_APP_NAME="{proj}"
+    content = f'''AGENT_APP_NAME="{proj}"
 USER_ID="{uid}"
 AGENT_ENV="{env}"
 ROOT_AGENT="{root}"
 SUB_AGENTS="{subs}"
 '''
+    if spec.get("pattern") in RESUMABLE_PATTERNS:
+        content += 'AGENT_RESUMABLE="true"\n'
+    components = resolve_components(spec)
+    if "sessions_db" not in components:
+        content += 'SESSION_BACKEND="memory"\n'
+    else:
+        content += (
+            "# SESSION_BACKEND: memory | sqlite | an async DB URL such as postgresql+asyncpg://... (pooled;\n"
+            "# install its driver). Unset: sqlite, except one-shot `main.py run` of a non-resumable app (memory).\n"
+        )
+    if "litellm" not in components:
+        content += '# litellm is not included: set CLOUD_AI_MODEL (e.g. a gemini-* model)\nCLOUD_AI_MODEL=""\n'
+    # Per-agent model tiers: AI_MODEL_<TIER>; unset tiers fall back to AI_MODEL
+    tiers = spec.get("model_tiers", {})
+    used = [spec.get("tier"), *(c.get("tier") for c in spec.get("sub_agent_config", {}).values())]
+    all_tiers = sorted({t for t in used if t} | set(tiers))
+    if all_tiers:
+        content += "# Per-agent model tiers; an unset tier uses CLOUD_AI_MODEL / LOCAL_AI_MODEL\n"
+    for tier in all_tiers:
+        if tier in tiers:
+            content += f'AI_MODEL_{tier.upper()}="{tiers[tier]}"\n'
+        else:
+            content += f'# AI_MODEL_{tier.upper()}=""\n'
+    return content
 
 
-def run(spec_path: Path, output_dir_override: Path | None) -> Path:
-    spec = load_spec(spec_path)
+def project_root_for(spec: dict, output_dir_override: Path | None) -> Path:
     out = Path(spec["output_dir"]).resolve()
     if output_dir_override is not None:
         out = output_dir_override.resolve()
-    project_name = spec["project_name"]
+    return out / spec["project_name"]
+
+
+def render_project(spec: dict) -> dict[str, bytes]:
+    """Render every scaffolded file for spec in memory, keyed by project-relative posix path."""
     root_agent = spec["root_agent"]
     sub_agents = spec["sub_agents"]
+    files: dict[str, str] = {".env": env_content(spec)}
+
+    # root_agent/
+    files[f"{root_agent}/__init__.py"] = root_init(root_agent)
+    files[f"{root_agent}/agent.py"] = root_agent_py(spec)
+
+    # root_agent/sub_agents/
+    sa = f"{root_agent}/sub_agents"
+    options = sub_agent_options(spec)
+    files[f"{sa}/__init__.py"] = sub_agents_init(sub_agents)
+    for name in sub_agents:
+        files[f"{sa}/{name}/__init__.py"] = sub_agent_init(name)
+        agent_opts = {k: v for k, v in spec["sub_agent_config"][name].items() if k in ("model", "tier", "description")}
+        files[f"{sa}/{name}/agent.py"] = sub_agent_py(name, **options.get(name, {}), **agent_opts)
+
+    files["requirements.txt"] = requirements_content(spec)
+    rendered = {path: text.encode("utf-8") for path, text in files.items()}
+    rendered.update(selected_assets(spec))
+    return rendered
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_manifest(root: Path) -> dict[str, str]:
+    """Return {path: sha256} recorded at the last generation of root."""
+    path = root / MANIFEST_NAME
+    if not path.is_file():
+        raise SystemExit(f"No {MANIFEST_NAME} in {root}; it was not generated by agent_forge (or predates manifests).")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != MANIFEST_VERSION:
+        raise SystemExit(f"Unsupported manifest version in {path}: {data.get('version')!r}")
+    return dict(data["files"])
+
+
+def manifest_content(spec: dict, hashes: dict[str, str]) -> str:
+    data = {
+        "version": MANIFEST_VERSION,
+        "project_name": spec["project_name"],
+        "files": dict(sorted(hashes.items())),
+    }
+    return json.dumps(data, indent=2) + "\n"
+
+
+def _staging_path(target: Path) -> Path:
+    """Hidden sibling of target (same filesystem, so a rename onto target is atomic)."""
+    return target.with_name(f".{target.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+
+
+def commit_tree(root: Path, files: dict[str, str | bytes]) -> None:
+    """
+    Write files into a staging directory next to root in one pass, then rename it
+    to root. root appears complete or not at all; a failure leaves nothing behind.
+    """
+    ensure_dir(root.parent)
+    staging = _staging_path(root)
+    staging.mkdir()
+    try:
+        for rel, content in files.items():
+            write(staging / rel, content)
+        os.rename(staging, root)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def replace_file(p: Path, content: str | bytes) -> None:
+    """Write p via a staged sibling and os.replace: readers never see a partial file."""
+    ensure_dir(p.parent)
+    staging = _staging_path(p)
+    try:
+        write(staging, content)
+        os.replace(staging, p)
+    except BaseException:
+        staging.unlink(missing_ok=True)
+        raise
+
+
+def build_project(spec: dict, root: Path, dry_run: bool = False) -> dict[str, list[str]]:
+    """Render every scaffolded file for spec plus the manifest and commit them to root atomically."""
+    files = render_project(spec)
+    if not dry_run:
+        manifest = manifest_content(spec, {rel: _digest(content) for rel, content in files.items()})
+        commit_tree(root, {**files, MANIFEST_NAME: manifest})
+    return {"written": sorted(files)}
+
+
+def update_project(spec: dict, root: Path, dry_run: bool = False) -> dict[str, list[str]]:
+    """
+    Re-render spec in memory and rewrite only files whose rendered content changed.
+
+    A file is only touched when its on-disk content still matches the manifest hash,
+    so hand edits made after generation are kept; a generated file that was deleted
+    is written again. Generated files the spec no longer produces are removed under
+    the same rule. Unchanged renders are never read from disk.
+    The whole plan is worked out before anything is written; each file is then
+    replaced atomically and the manifest goes last. dry_run stops after the plan.
+    """
+    old = read_manifest(root)
+    files = render_project(spec)
+    hashes: dict[str, str] = {}
+    report: dict[str, list[str]] = {"written": [], "removed": [], "kept_modified": [], "unchanged": []}
+
+    def _pristine(rel: str) -> bool:
+        p = root / rel
+        return p.is_file() and _digest(p.read_bytes()) == old[rel]
+
+    for rel, content in files.items():
+        new_hash = _digest(content)
+        prev = old.get(rel)
+        if prev is not None and not (root / rel).exists():
+            # Generated before and deleted since: restore it.
+            hashes[rel] = new_hash
+            report["written"].append(rel)
+        elif prev == new_hash:
+            hashes[rel] = prev
+            report["unchanged"].append(rel)
+        elif prev is None and (root / rel).exists():
+            # Not ours: a file the user created where we now want to generate one.
+            report["kept_modified"].append(rel)
+        elif prev is None or _pristine(rel):
+            hashes[rel] = new_hash
+            report["written"].append(rel)
+        else:
+            hashes[rel] = prev
+            report["kept_modified"].append(rel)
+
+    for rel in sorted(set(old) - set(files)):
+        if _pristine(rel):
+            report["removed"].append(rel)
+        elif (root / rel).exists():
+            report["kept_modified"].append(rel)
+
+    if dry_run:
+        return report
+    for rel in report["written"]:
+        replace_file(root / rel, files[rel])
+    for rel in report["removed"]:
+        (root / rel).unlink()
+        _prune_empty_dirs(root, (root / rel).parent)
+    replace_file(root / MANIFEST_NAME, manifest_content(spec, hashes))
+    return report
 
-    root = out / project_name
-    if root.exists():
+
+def _prune_empty_dirs(root: Path, d: Path) -> None:
+    while d != root and d.is_dir() and not any(d.iterdir()):
+        d.rmdir()
+        d = d.parent
+
+
+def forge_project(spec: dict, root: Path, update: bool = False, dry_run: bool = False) -> dict[str, list[str]]:
+    """Create or update one project; the unit of work for the process pool."""
+    return update_project(spec, root, dry_run) if update else build_project(spec, root, dry_run)
+
+
+def run(
+    spec_path: Path,
+    output_dir_override: Path | None,
+    update: bool = False,
+    dry_run: bool = False,
+) -> tuple[Path, dict, dict]:
+    spec = load_spec(spec_path)
+    root = project_root_for(spec, output_dir_override)
+    if update and not root.is_dir():
+        raise SystemExit(f"Project root does not exist: {root}. Run without --update to create it.")
+    if not update and root.exists():
         raise SystemExit(
             f"Project root already exists: {root}. "
-            "Use a different --output-dir or project_name in the spec."
+            "Use --update, a different --output-dir, or project_name in the spec."
         )
+    report = forge_project(spec, root, update, dry_run)
+    return root, spec, report
 
-    # .env
-    write(root / ".env", env_content(spec))
 
-    # root_agent/
-    ra = root / root_agent
-    write(ra / "__init__.py", root_init(root_agent))
-    write(ra / "agent.py", root_agent_py(spec))
+def collect_spec_paths(spec_paths: tuple[Path, ...], specs_dir: Path | None) -> list[Path]:
+    """Merge -f files and every spec file in --specs-dir, keeping order and dropping duplicates."""
+    paths = list(spec_paths)
+    if specs_dir is not None:
+        paths.extend(
+            sorted(p for p in specs_dir.iterdir() if p.is_file() and p.suffix.lower() in SPEC_SUFFIXES)
+        )
+    seen: set[Path] = set()
+    unique: list[Path] = []
+    for p in paths:
+        key = p.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
 
-    # root_agent/sub_agents/
-    sa = ra / "sub_agents"
-    write(sa / "__init__.py", sub_agents_init(sub_agents))
-    for name in sub_agents:
-        subdir = sa / name
-        write(subdir / "__init__.py", sub_agent_init(name))
-        write(subdir / "agent.py", sub_agent_py(name))
 
-    copy_core_assets(root)
-    return root, spec
+def run_many(
+    spec_paths: list[Path],
+    output_dir_override: Path | None,
+    jobs: int | None = None,
+    update: bool = False,
+    dry_run: bool = False,
+) -> list[tuple[Path, dict, dict]]:
+    """
+    Load and validate every spec before touching disk, then build (or update) the
+    projects concurrently in a process pool. Returns (root, spec, report) in input order.
+    If any project fails, the error also lists the projects that were written.
+    dry_run plans every project in this process and writes nothing.
+    """
+    planned: list[tuple[Path, dict]] = []
+    errors: list[str] = []
+    roots: dict[Path, Path] = {}
+    for path in spec_paths:
+        try:
+            spec = load_spec(path)
+        except SystemExit as e:
+            errors.append(f"{path}: {e}")
+            continue
+        root = project_root_for(spec, output_dir_override)
+        if root in roots:
+            errors.append(f"{path}: project root {root} is also produced by {roots[root]}")
+        elif update and not root.is_dir():
+            errors.append(f"{path}: project root does not exist: {root}")
+        elif not update and root.exists():
+            errors.append(f"{path}: project root already exists: {root}")
+        roots.setdefault(root, path)
+        planned.append((root, spec))
+    if errors:
+        raise SystemExit("Spec validation failed:\n  " + "\n  ".join(errors))
+    if not SRC_DIR.is_dir():
+        raise SystemExit(f"Source directory not found: {SRC_DIR}")
+    if dry_run:
+        return [(root, spec, forge_project(spec, root, update, dry_run=True)) for root, spec in planned]
+
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(planned)))
+    failures: list[str] = []
+    reports: dict[int, dict] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(forge_project, spec, root, update): i for i, (root, spec) in enumerate(planned)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                reports[i] = fut.result()
+            except (Exception, SystemExit) as e:
+                failures.append(f"{planned[i][1]['project_name']}: {e}")
+    if failures:
+        done = [f"{planned[i][1]['project_name']}: {planned[i][0]}" for i in sorted(reports)]
+        raise SystemExit(
+            "Project generation failed:\n  "
+            + "\n  ".join(failures)
+            + (f"\n{'Updated' if update else 'Created'}:\n  " + "\n  ".join(done) if done else "")
+        )
+    return [(root, spec, reports[i]) for i, (root, spec) in enumerate(planned)]
+
+
+def _update_counts(report: dict[str, list[str]]) -> str:
+    return ", ".join(f"{len(report[k])} {k.replace('_', ' ')}" for k in ("written", "removed", "kept_modified"))
+
+
+def _print_update_report(root: Path, report: dict[str, list[str]], dry_run: bool = False) -> None:
+    """Print what --update changed, and which hand-edited files it left alone."""
+    click.echo(f"\n--- Update{' (dry run, nothing written)' if dry_run else ''}: {root} ---")
+    click.echo(f"  {_update_counts(report)}, {len(report['unchanged'])} unchanged")
+    for key, mark in (("written", "~"), ("removed", "-"), ("kept_modified", "!")):
+        for rel in report[key]:
+            click.echo(f"  {mark} {rel}")
+    if report["kept_modified"]:
+        click.echo("  (! = edited by hand since generation; left untouched)")
+
+
+def _print_batch_report(results: list[tuple[Path, dict, dict]], update: bool = False, dry_run: bool = False) -> None:
+    """Print one combined report for a multi-spec run."""
+    click.echo(f"\n--- Projects ({len(results)}) ---")
+    width = max(len(spec["project_name"]) for _, spec, _ in results)
+    for root, spec, report in results:
+        pattern = spec.get("pattern", "-")
+        detail = _update_counts(report) if update else f"{len(report['written']):>3} files"
+        click.echo(f"  {spec['project_name']:<{width}}  {pattern:<36} {detail}  {root}")
+        if update:
+            for rel in report["kept_modified"]:
+                click.echo(f"  {'':<{width}}  ! {rel} (edited by hand; left untouched)")
+
+    if dry_run:
+        click.echo("\n(dry run: nothing written)")
+        return
+    click.echo("\n--- Next steps ---")
+    for root, spec, _ in results:
+        check = " && python check_env.py" if "check_env" in resolve_components(spec) else ""
+        click.echo(f"  cd {root}{check}")
 
 
 @click.command(
     context_settings={"help_option_names": ["-h", "--help"]},
-    help="Scaffold an ADK agent from a YAML or JSON spec.",
+    help="Scaffold ADK agents from one or more YAML or JSON specs.",
 )
 @click.option(
     "-f",
     "--file",
-    "spec_path",
+    "spec_paths",
     type=click.Path(exists=True, path_type=Path),
-    required=True,
-    help="Path to YAML or JSON spec (project_name, root_agent, sub_agents, etc.).",
+    multiple=True,
+    help="Path to YAML or JSON spec (project_name, root_agent, sub_agents, etc.). Repeatable.",
+)
+@click.option(
+    "--specs-dir",
+    "specs_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=None,
+    help="Directory of specs; every .yaml/.yml/.json file in it is scaffolded.",
 )
 @click.option(
     "--output-dir",
@@ -326,13 +1462,60 @@ def run(spec_path: Path, output_dir_override: Path | None) -> Path:
     default=None,
     help="Override output_dir from spec. Project is created at <output-dir>/<project_name>.",
 )
-def main(spec_path: Path, output_dir: Path | None) -> None:
-    if not spec_path.is_file():
-        click.echo(f"Not a file: {spec_path}", err=True)
+@click.option(
+    "--jobs",
+    "-j",
+    "jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes for multi-spec runs (default: CPU count).",
+)
+@click.option(
+    "--update",
+    "-u",
+    "update",
+    is_flag=True,
+    default=False,
+    help=f"Regenerate existing projects in place using {MANIFEST_NAME}; hand-edited files are kept.",
+)
+@click.option(
+    "--dry-run",
+    "-n",
+    "dry_run",
+    is_flag=True,
+    default=False,
+    help="Render and report what would be created or updated, without writing anything.",
+)
+def main(
+    spec_paths: tuple[Path, ...],
+    specs_dir: Path | None,
+    output_dir: Path | None,
+    jobs: int | None,
+    update: bool,
+    dry_run: bool,
+) -> None:
+    for p in spec_paths:
+        if not p.is_file():
+            click.echo(f"Not a file: {p}", err=True)
+            sys.exit(1)
+    paths = collect_spec_paths(spec_paths, specs_dir)
+    if not paths:
+        click.echo("No specs given. Use -f/--file or --specs-dir.", err=True)
         sys.exit(1)
-    root, spec = run(spec_path, output_dir)
-    click.echo(f"Created project at: {root}")
-    _print_success_report(root, spec)
+
+    if len(paths) == 1:
+        root, spec, report = run(paths[0], output_dir, update, dry_run)
+        if update:
+            _print_update_report(root, report, dry_run)
+            return
+        click.echo(f"{'Would create' if dry_run else 'Created'} project at: {root}")
+        _print_success_report(root, spec, dry_run)
+        return
+
+    results = run_many(paths, output_dir, jobs, update, dry_run)
+    verb = ("Would update" if update else "Would create") if dry_run else ("Updated" if update else "Created")
+    click.echo(f"{verb} {len(results)} projects.")
+    _print_batch_report(results, update, dry_run)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,240 @@
+"""
+Offline benchmark for the generated agent graph.
+
+Swaps every model for an in-process fake (configurable latency, canned
+responses) and runs N requests through execute_agent_stream, so the cost of
+the pattern itself -- session create, event persistence, tool dispatch --
+shows up without a model bill. With --latency-ms 0 (default), "total" is pure
+framework overhead.
+
+Canned responses (--responses FILE) are JSON: agent name -> steps. A step is
+either text (ends the agent's turn) or {"tool": name, "args": {...}} (a
+function call); an agent with no steps left answers with a short canned text.
+  {"my_root": [{"tool": "my_specialist", "args": {"request": "hi"}}, "done"]}
+
+Usage:
+python bench.py --requests 50
+python bench.py -n 50 --latency-ms 200 --backend memory --responses bench.json
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import AsyncGenerator
+
+import click
+
+# The fake replaces every model: no cloud key or litellm needed, and benchmark
+# sessions are kept apart from real ones.
+os.environ["CLOUD_AI_MODEL"] = "bench-fake"
+os.environ["USER_ID"] = "bench"
+
+from google.adk.apps.app import App, ResumabilityConfig
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from tools import config
+from tools.timings import Timings, TimingsPlugin
+
+METRICS = ("total", "session_create", "event_persist", "tool_dispatch", "model_wait")
+
+# tools.timings span phase -> (metric, call counter)
+_PHASE_METRICS = {
+    "session_create": ("session_create", None),
+    "db_append": ("event_persist", "events"),
+    "tool": ("tool_dispatch", "tool_calls"),
+    "llm": ("model_wait", "model_calls"),
+}
+
+
+class FakeLlm(BaseLlm):
+    """In-process model: sleeps latency_s, then replays the agent's canned steps."""
+
+    model: str = "bench-fake"
+    latency_s: float = 0.0
+    steps: dict[str, list] = {}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        agent = (llm_request.config.labels or {}).get("adk_agent_name", "agent")
+        steps = self.steps.get(agent, [])
+        turn = _turn_index(llm_request)
+        step = steps[turn] if turn < len(steps) else f"[{agent}] canned response."
+        if isinstance(step, dict):
+            call = types.FunctionCall(name=step["tool"], args=step.get("args", {}))
+            part = types.Part(function_call=call)
+        else:
+            part = types.Part(text=step)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def _turn_index(llm_request: LlmRequest) -> int:
+    """Tool results the agent has received since the last user text: its step number."""
+    turn = 0
+    for content in reversed(llm_request.contents):
+        parts = content.parts or []
+        if any(p.function_response for p in parts):
+            turn += 1
+        elif content.role == "user" and any(p.text for p in parts):
+            break
+    return turn
+
+
+def _sample(timings) -> dict[str, float]:
+    """One request's metrics from its tools.timings spans: seconds per metric, plus call counts."""
+    sample: dict[str, float] = defaultdict(float, total=timings.wall_s)
+    for phase, _, _, _, duration in timings.spans:
+        metric, counter = _PHASE_METRICS[phase]
+        sample[metric] += duration
+        if counter:
+            sample[counter] += 1
+    return sample
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _print_report(samples: list[dict[str, float]]) -> None:
+    wall = sum(s["total"] for s in samples)
+    click.echo(
+        f"\n--- {len(samples)} requests in {wall:.2f}s ({len(samples) / wall:.1f} req/s) ---"
+    )
+    click.echo(f"  {'metric':<16}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for metric in METRICS:
+        values = [s.get(metric, 0.0) * 1000 for s in samples]
+        mean = sum(values) / len(values)
+        click.echo(
+            f"  {metric:<16}{percentile(values, 50):>10.2f}{percentile(values, 99):>10.2f}{mean:>10.2f}"
+        )
+    overhead = [(s["total"] - s.get("model_wait", 0.0)) * 1000 for s in samples]
+    click.echo(
+        f"  {'total-model':<16}{percentile(overhead, 50):>10.2f}{percentile(overhead, 99):>10.2f}"
+    )
+    for counter in ("events", "model_calls", "tool_calls"):
+        click.echo(
+            f"  {counter:<16}{sum(s.get(counter, 0) for s in samples) / len(samples):>10.1f} per request"
+        )
+    click.echo(
+        "  (tool_dispatch includes nested agent runs; total-model is approximate for parallel patterns)"
+    )
+
+
+async def _bench(
+    app: App, execute_agent_stream, prompt: str, n: int, warmup: int
+) -> list[dict[str, float]]:
+    samples = []
+    for i in range(warmup + n):
+        timings = Timings()
+        await execute_agent_stream(app, prompt, timings=timings)
+        if i >= warmup:
+            samples.append(_sample(timings))
+    return samples
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option(
+    "--requests",
+    "-n",
+    "n",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Measured requests.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Unmeasured requests run first.",
+)
+@click.option(
+    "--latency-ms",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="Fake model latency per call.",
+)
+@click.option(
+    "--responses",
+    "-r",
+    "responses_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file of canned steps per agent (see module docstring).",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["sqlite", "memory"]),
+    default=None,
+    help="Session backend (default: SESSION_BACKEND from .env).",
+)
+@click.option(
+    "--input",
+    "-i",
+    "prompt",
+    default="Benchmark request.",
+    show_default=True,
+    help="Prompt sent on every request.",
+)
+def bench(
+    n: int,
+    warmup: int,
+    latency_ms: float,
+    responses_path: str | None,
+    backend: str | None,
+    prompt: str,
+) -> None:
+    """Measure framework overhead of the agent graph with a fake model."""
+    if backend:
+        os.environ["SESSION_BACKEND"] = backend
+    steps = {}
+    if responses_path:
+        with open(responses_path, encoding="utf-8") as f:
+            steps = json.load(f)
+
+    # Patch the model before any agent module is imported
+    fake = FakeLlm(latency_s=latency_ms / 1000, steps=steps)
+    config.AI_MODEL = fake
+    config.get_model = lambda model: fake
+
+    from tools import runner_utils
+    from tools.logging_utils import setup_logging
+
+    setup_logging(debug=False, model_name=f"bench-fake ({latency_ms:g} ms)")
+    # ADK logs every Runner/plugin setup at INFO: keep the report readable
+    logging.getLogger("google_adk").setLevel(logging.WARNING)
+
+    root_agent = importlib.import_module(f"{config.ROOT_AGENT}.agent").root_agent
+    app = App(
+        name=runner_utils.APP_NAME,
+        root_agent=root_agent,
+        plugins=[TimingsPlugin()],
+        resumability_config=ResumabilityConfig(is_resumable=True)
+        if config.RESUMABLE
+        else None,
+    )
+    click.echo(
+        f"Benchmarking {config.ROOT_AGENT} ({runner_utils.SESSION_BACKEND} sessions, {n} requests)..."
+    )
+    samples = asyncio.run(
+        _bench(app, runner_utils.execute_agent_stream, prompt, n, warmup)
+    )
+    _print_report(samples)
+
+
+if __name__ == "__main__":
+    bench()
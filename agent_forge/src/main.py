@@ -1,35 +1,46 @@
 """
 CLI for ADK agents generated by agent_forge.
 
-Reads ROOT_AGENT and SUB_AGENTS from tools.config (from .env), dynamically
-imports root_agent and sub-agents via importlib, and runs the app.
+Reads ROOT_AGENT and SUB_AGENTS from tools.config (from .env), imports
+root_agent via importlib (sub-agents load with it, or on first use when the
+root uses tools.lazy_agents), and runs the app.
 
-Accepts user query with debug and thoughts options.
+Accepts user query with debug, thoughts and stream options.
+
+ADK and the agents are imported inside the commands that need them: with a
+daemon running, `run` only forwards the query and skips that startup cost
+(runs with --debug, --thoughts or --timings load the agents in-process).
 
 Usage:
 python -m main run --help
+python -m main run --input "..." --timings
+python -m main daemon
+python -m main serve --port 8080 --max-concurrency 4
+python -m main batch --in prompts.jsonl --out results.jsonl --concurrency 8 --workers 4
+python -m main pending
+python -m main resume --session <id> --approve
 
 """
 
 from __future__ import annotations
 
 import asyncio
+import functools
 import importlib
 import os
 import sys
+import uuid
+from pathlib import Path
 
 import click
 
-from google.adk.apps.app import App
-from google.adk.planners.built_in_planner import BuiltInPlanner
-from google.genai import types
-
-from tools.config import AI_MODEL_NAME, INCLUDE_THOUGHTS, LOCAL_LLM, ROOT_AGENT, SUB_AGENTS
-from tools.logging_utils import setup_logging, THEME
-from tools.runner_utils import execute_agent_stream, APP_NAME
+from tools import daemon
+from tools.logging_utils import THEME, agent_children, flush_traces
 
 
 def _load_root_agent() -> object:
+    from tools.config import ROOT_AGENT
+
     mod = importlib.import_module(f"{ROOT_AGENT}.agent")
     root = getattr(mod, "root_agent", None)
     if root is None:
@@ -37,18 +48,177 @@ def _load_root_agent() -> object:
     return root
 
 
-def _load_sub_agent(name: str) -> object:
-    mod = importlib.import_module(f"{ROOT_AGENT}.sub_agents.{name}.agent")
-    agent = getattr(mod, name, None)
-    if agent is None:
-        raise SystemExit(f"Sub-agent {name!r} not found in {ROOT_AGENT}.sub_agents.{name}.agent")
-    return agent
+def _loaded_agents(agent: object) -> list[object]:
+    """agent plus every agent already built beneath it (see logging_utils.agent_children)."""
+    found = [agent]
+    for child in agent_children(agent):
+        found.extend(_loaded_agents(child))
+    return found
+
+
+def _prepare_agents(debug: bool, show_thoughts: bool) -> tuple[object, bool]:
+    """Load agents, apply the thoughts setting, and set up logging."""
+    from google.adk.planners.built_in_planner import BuiltInPlanner
+    from google.genai import types
+
+    from tools import config
+    from tools.logging_utils import setup_logging
+
+    include_thoughts = show_thoughts or (debug and config.INCLUDE_THOUGHTS)
+    # Agents read tools.config.INCLUDE_THOUGHTS when built, including sub-agents
+    # that are only imported later (on first use).
+    config.INCLUDE_THOUGHTS = include_thoughts
+    root_agent = _load_root_agent()
+
+    for agent in _loaded_agents(root_agent):
+        if getattr(agent, "planner", None) and isinstance(agent.planner, BuiltInPlanner):
+            agent.planner.thinking_config = types.ThinkingConfig(include_thoughts=include_thoughts)
+
+    setup_logging(debug=debug, model_name=config.AI_MODEL_NAME)
+    return root_agent, include_thoughts
+
+
+def _build_app(root_agent: object, plugins: list | None = None):
+    from google.adk.apps.app import App, ResumabilityConfig
+
+    from tools.config import RESUMABLE
+    from tools.runner_utils import APP_NAME
+
+    return App(
+        name=APP_NAME,
+        root_agent=root_agent,
+        plugins=plugins or [],
+        # Built only when needed: ADK warns that ResumabilityConfig is experimental
+        resumability_config=ResumabilityConfig(is_resumable=True) if RESUMABLE else None,
+    )
+
+
+def _app_state(include_thoughts: bool) -> dict:
+    """
+    Constants every session can read, as app-scoped state ("app:" keys, e.g.
+    {app:model_name} in an instruction). The session service keeps them once
+    per app instead of copying them into each session row.
+    """
+    from google.adk.sessions.state import State
+
+    from tools.config import AI_MODEL_NAME, LOCAL_LLM, ROOT_AGENT, SUB_AGENTS
+    from tools.runner_utils import APP_NAME
+
+    constants = {
+        "root_agent": ROOT_AGENT,
+        "sub_agent": SUB_AGENTS,
+        "application": APP_NAME,
+        "environment": os.getenv("AGENT_ENV", "development"),
+        "model_name": AI_MODEL_NAME,
+        "local_llm": LOCAL_LLM,
+        "include_thoughts": include_thoughts,
+    }
+    return {f"{State.APP_PREFIX}{key}": value for key, value in constants.items()}
+
+
+def _pending_record(session_id: str) -> dict | None:
+    """The approval a run paused on, if any."""
+    from tools.config import RESUMABLE
+
+    if not RESUMABLE:
+        return None
+    from tools.approvals import load_pending
+
+    return load_pending(session_id)
+
+
+async def _answer(app, input_text: str, debug: bool, stream: bool = False, on_event=None) -> dict:
+    """Run one request in its own session, released afterwards: {"session_id", "text", "pending"}."""
+    from tools.runner_utils import execute_agent_stream, release_session
+
+    session_id = str(uuid.uuid4())
+    try:
+        final_text = await execute_agent_stream(
+            app, input_text, None, debug, session_id=session_id, on_event=on_event, stream=stream
+        )
+        return {"session_id": session_id, "text": final_text, "pending": _pending_record(session_id)}
+    finally:
+        await release_session(app.name, session_id)
+
 
+def _echo_pending(record: dict | None) -> None:
+    """If the run paused on a human approval, say how to resume it."""
+    if record:
+        click.secho(f"\n[Awaiting approval]: {record['summary']}", **THEME["call"])
+        click.echo(f"  python main.py resume --session {record['session_id']} --approve   (or --reject)")
 
-def _load_agents() -> tuple[object, list[object]]:
-    root = _load_root_agent()
-    subs = [_load_sub_agent(name) for name in SUB_AGENTS]
-    return root, subs
+
+def _echo_timings(timings, root_agent: object, session_id: str, show: bool, json_path: str | None) -> None:
+    """Print the latency breakdown and/or write it as JSON."""
+    import json
+
+    from tools.timings import format_report
+
+    report = {"session_id": session_id, **timings.report(root_agent)}
+    if show:
+        click.secho("\n--- TIMINGS (slowest first) ---", fg="magenta", bold=True)
+        for line in format_report(report):
+            click.secho(line, fg="magenta")
+    if json_path:
+        Path(json_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        click.echo(f"Timings written to {json_path}")
+
+
+class _StreamPrinter:
+    """
+    --stream output: writes reply text as it arrives. One agent streams at a
+    time, so parallel branches do not interleave chunk by chunk: the others
+    (and agents that do not call a model) are printed whole once the streaming
+    agent's reply is complete. Each agent's output starts on its own line.
+    """
+
+    def __init__(self):
+        self._active: str | None = None  # author whose chunks are being printed
+        self._held: set[str] = set()  # authors with chunks not printed; print their complete text
+        self._waiting: list[tuple[str, str]] = []  # complete texts queued behind the active author
+        self._last: str | None = None  # author of the last text written
+
+    def _write(self, author: str, text: str) -> None:
+        if self._last is not None and author != self._last:
+            click.echo()
+        click.echo(text, nl=False)
+        self._last = author
+
+    def __call__(self, message: dict) -> None:
+        author, text = message["author"], message["text"]
+        if message["partial"]:
+            if self._active in (None, author) and author not in self._held:
+                self._active = author
+                self._write(author, text)
+            else:
+                self._held.add(author)
+        elif author == self._active:
+            self._active = None  # already printed chunk by chunk
+            for waiting_author, waiting_text in self._waiting:
+                self._write(waiting_author, waiting_text)
+            self._waiting.clear()
+        elif text:
+            self._held.discard(author)
+            if self._active is None:
+                self._write(author, text)
+            else:
+                self._waiting.append((author, text))
+
+
+def _run_via_daemon(path, input_text: str, stream: bool) -> None:
+    """Thin client: forward the query to the daemon and print what it streams back."""
+    printer = _StreamPrinter() if stream else None
+    for message in daemon.request(path, {"input": input_text, "stream": stream}):
+        if message["type"] == "event":
+            if printer:
+                printer(message)
+        elif message["type"] == "final":
+            click.echo("" if stream else f"\n{message['text']}")
+            _echo_pending(message.get("pending"))
+        else:
+            label = "Validation Error" if message.get("kind") == "validation" else "System Failure"
+            click.secho(f"\n[{label}]: {message['message']}", **THEME["err"])
+            sys.exit(1)
 
 
 @click.group(context_settings={"help_option_names": ["-h", "--help"]})
@@ -76,22 +246,38 @@ def cli() -> None:
     default=False,
     help="Show agent's inner reasoning.",
 )
+@click.option(
+    "--stream", "-s", "stream",
+    is_flag=True,
+    default=False,
+    help="Print the reply as the model generates it.",
+)
+@click.option(
+    "--daemon/--no-daemon", "use_daemon",
+    default=True,
+    help="Forward to a running `main.py daemon` if there is one (default; not with -d, -t or timings).",
+)
+@click.option(
+    "--timings", "show_timings",
+    is_flag=True,
+    default=False,
+    help="Print where the time went: session create, model and tool calls, DB appends.",
+)
+@click.option(
+    "--timings-json", "timings_json",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the timing breakdown and every span to this JSON file.",
+)
 def run_command(
     input_text: str | None,
     debug: bool,
     show_thoughts: bool,
+    stream: bool,
+    use_daemon: bool,
+    show_timings: bool,
+    timings_json: str | None,
 ) -> None:
     """Run the project's dedicated agent."""
-    include_thoughts = show_thoughts or (debug and INCLUDE_THOUGHTS)
-    root_agent, sub_agents = _load_agents()
-    agents_to_update = [root_agent] + sub_agents
-
-    for agent in agents_to_update:
-        if getattr(agent, "planner", None) and isinstance(agent.planner, BuiltInPlanner):
-            agent.planner.thinking_config = types.ThinkingConfig(include_thoughts=include_thoughts)
-
-    setup_logging(debug=debug, model_name=AI_MODEL_NAME)
-
     if input_text is None:
         if not sys.stdin.isatty():
             input_text = sys.stdin.read().strip()
@@ -99,22 +285,53 @@ def run_command(
             click.secho("Error: No input provided. Use --input or pipe text.", **THEME["err"])
             return
 
-    app = App(name=APP_NAME, root_agent=root_agent)
-    initial_state = {
-        "root_agent": ROOT_AGENT,
-        "sub_agent": SUB_AGENTS,
-        "application": APP_NAME,
-        "environment": os.getenv("AGENT_ENV", "development"),
-        "model_name": AI_MODEL_NAME,
-        "local_llm": LOCAL_LLM,
-        "include_thoughts": include_thoughts,
-    }
+    timed = show_timings or bool(timings_json)
+    path = daemon.socket_path()
+    # Tracing, thoughts and timings are set up in the process running the agents:
+    # the daemon's were fixed at its startup, so those runs stay in this process
+    if use_daemon and not (debug or show_thoughts or timed) and daemon.is_running(path):
+        _run_via_daemon(path, input_text, stream)
+        return
+
+    from tools.config import RESUMABLE
+
+    if not RESUMABLE and not os.environ.get("SESSION_BACKEND", "").strip():
+        # One-shot run with nothing to resume: keep its session in memory unless .env picks a store
+        os.environ["SESSION_BACKEND"] = "memory"
+    from tools.runner_utils import execute_agent_stream
+    from tools.timings import Timings, TimingsPlugin
+
+    root_agent, include_thoughts = _prepare_agents(debug, show_thoughts)
+    app = _build_app(root_agent, [TimingsPlugin()] if timed else None)
+    timings = Timings() if timed else None
+    session_id = str(uuid.uuid4())
+    # One session per process: the app row is written by this same create_session
+    initial_state = _app_state(include_thoughts)
+    on_event = None
+    if stream:
+        printer = _StreamPrinter()
+
+        async def on_event(event) -> None:
+            printer(daemon.event_summary(event))
 
     try:
         final_text = asyncio.run(
-            execute_agent_stream(app, input_text, initial_state, debug)
+            execute_agent_stream(
+                app,
+                input_text,
+                initial_state,
+                debug,
+                session_id=session_id,
+                on_event=on_event,
+                stream=stream,
+                timings=timings,
+            )
         )
-        click.echo(f"\n{final_text}")
+        flush_traces()
+        click.echo("" if stream else f"\n{final_text}")
+        _echo_pending(_pending_record(session_id))
+        if timed:
+            _echo_timings(timings, root_agent, session_id, show_timings, timings_json)
     except ValueError as ve:
         click.secho(f"\n[Validation Error]: {ve}", **THEME["err"])
         sys.exit(1)
@@ -126,5 +343,247 @@ def run_command(
         sys.exit(1)
 
 
+@cli.command("daemon")
+@click.option("--debug", "-d", "debug", is_flag=True, default=False, help="Trace every run in the daemon's output.")
+@click.option("--thoughts", "-t", "show_thoughts", is_flag=True, default=False, help="Show agent's inner reasoning.")
+def daemon_command(debug: bool, show_thoughts: bool) -> None:
+    """Keep agents, App and session service loaded; `run` forwards to this process."""
+    from tools.config import ROOT_AGENT
+    from tools.runner_utils import warm_up_sessions
+
+    root_agent, include_thoughts = _prepare_agents(debug, show_thoughts)
+    app = _build_app(root_agent)
+    app_state = _app_state(include_thoughts)
+
+    async def handle(request: dict, send: daemon.Send) -> None:
+        async def forward(event) -> None:
+            await send(daemon.event_summary(event))
+
+        try:
+            reply = await _answer(
+                app, request["input"], debug, stream=bool(request.get("stream")), on_event=forward
+            )
+        except ValueError as ve:
+            await send({"type": "error", "kind": "validation", "message": str(ve)})
+            return
+        await send({"type": "final", **reply})
+
+    async def main() -> None:
+        await warm_up_sessions(app.name, app_state)
+        await daemon.serve(handle, path)
+
+    path = daemon.socket_path()
+    click.echo(f"Serving {ROOT_AGENT} on {path} (Ctrl-C to stop).")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        click.echo("\nDaemon stopped.")
+
+
+@cli.command("serve")
+@click.option("--host", envvar="SERVE_HOST", default="127.0.0.1", show_default=True, help="Interface to bind (env SERVE_HOST).")
+@click.option("--port", "-p", envvar="SERVE_PORT", type=int, default=8080, show_default=True, help="Port (env SERVE_PORT).")
+@click.option(
+    "--max-concurrency", "-c",
+    envvar="SERVE_MAX_CONCURRENCY",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Agent runs executing at once (env SERVE_MAX_CONCURRENCY).",
+)
+@click.option(
+    "--max-queue",
+    envvar="SERVE_MAX_QUEUE",
+    type=click.IntRange(min=0),
+    default=32,
+    show_default=True,
+    help="Requests waiting for a slot before new ones get 503 (env SERVE_MAX_QUEUE).",
+)
+@click.option("--debug", "-d", "debug", is_flag=True, default=False, help="Trace every run in the server's output.")
+@click.option("--thoughts", "-t", "show_thoughts", is_flag=True, default=False, help="Show agent's inner reasoning.")
+def serve_command(host: str, port: int, max_concurrency: int, max_queue: int, debug: bool, show_thoughts: bool) -> None:
+    """Serve the agent over HTTP: POST /run {"input": ...}, one session per request."""
+    from tools import http_server
+    from tools.config import ROOT_AGENT
+    from tools.runner_utils import warm_up_sessions
+
+    root_agent, include_thoughts = _prepare_agents(debug, show_thoughts)
+    app = _build_app(root_agent)
+    app_state = _app_state(include_thoughts)
+
+    async def handle(request: dict) -> dict:
+        return await _answer(app, request["input"], debug)
+
+    async def main() -> None:
+        await warm_up_sessions(app.name, app_state)
+        await http_server.serve(handle, host, port, max_concurrency, max_queue)
+
+    click.echo(
+        f"Serving {ROOT_AGENT} on http://{host}:{port} "
+        f"(max {max_concurrency} concurrent, {max_queue} queued; Ctrl-C to stop)."
+    )
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        click.echo("\nServer stopped.")
+
+
+def _batch_handler(debug: bool, show_thoughts: bool):
+    """Load the agents and return the per-row handler for `batch` (once per process)."""
+    from tools.runner_utils import warm_up_sessions
+
+    root_agent, include_thoughts = _prepare_agents(debug, show_thoughts)
+    app = _build_app(root_agent)
+    app_state = _app_state(include_thoughts)
+    published = None  # app state is written once per process, before its first session
+
+    async def handle(input_text: str) -> dict:
+        nonlocal published
+        if published is None:
+            published = asyncio.ensure_future(warm_up_sessions(app.name, app_state))
+        await published
+        return await _answer(app, input_text, debug)
+
+    return handle
+
+
+@cli.command("batch")
+@click.option(
+    "--in", "in_path",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help='JSONL input: {"id": ..., "input": ...} per line.',
+)
+@click.option(
+    "--out", "out_path",
+    required=True,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="JSONL results, appended; ids already ok in it are skipped.",
+)
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=4, show_default=True, help="Rows run at once (per worker).")
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Processes to spread rows over (CPU-bound tools, validation, serialization).",
+)
+@click.option("--debug", "-d", "debug", is_flag=True, default=False, help="Enable event tracing and state inspection.")
+@click.option("--thoughts", "-t", "show_thoughts", is_flag=True, default=False, help="Show agent's inner reasoning.")
+def batch_command(
+    in_path: Path,
+    out_path: Path,
+    concurrency: int,
+    workers: int,
+    debug: bool,
+    show_thoughts: bool,
+) -> None:
+    """Run every prompt in a JSONL file as its own session, on one shared runner per process."""
+    from tools.jsonl_batch import run_batch, run_sharded
+    from tools.runner_utils import APP_NAME, enable_wal, warm_up_sessions
+
+    def on_result(row: dict) -> None:
+        if row["status"] == "ok":
+            click.echo(f"  ok    {row['id']} ({row['elapsed_s']:.1f}s)")
+        else:
+            click.secho(f"  error {row['id']}: {row['error']}", **THEME["err"])
+
+    if workers > 1:
+        # Worker processes share the session DB: WAL lets them write concurrently,
+        # and the app/user rows exist before they start (no insert race)
+        enable_wal()
+        asyncio.run(warm_up_sessions(APP_NAME))
+        click.echo(f"Running {in_path} on {workers} workers x {concurrency} concurrent rows...")
+        handler_factory = functools.partial(_batch_handler, debug, show_thoughts)
+        counts = run_sharded(handler_factory, in_path, out_path, workers, concurrency, on_result)
+    else:
+        handle = _batch_handler(debug, show_thoughts)
+        counts = asyncio.run(run_batch(handle, in_path, out_path, concurrency, on_result))
+    click.echo(f"\nDone: {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} skipped (already ok) -> {out_path}")
+    if counts["error"]:
+        sys.exit(1)
+
+
+@cli.command("pending")
+def pending_command() -> None:
+    """List runs paused for human approval."""
+    from tools.config import RESUMABLE
+
+    if not RESUMABLE:
+        click.echo("This project is not resumable (AGENT_RESUMABLE is not true); nothing can be pending.")
+        return
+    from tools.approvals import list_pending
+
+    records = list_pending()
+    if not records:
+        click.echo("No pending approvals.")
+        return
+    for r in records:
+        click.echo(f"{r['created_at']}  {r['session_id']}  [{r['agent']}] {r['summary']}")
+
+
+@cli.command("resume")
+@click.option("--session", "-s", "session_id", required=True, help="Session id of the paused run.")
+@click.option(
+    "--approve/--reject",
+    "approved",
+    default=None,
+    help="Human decision for the pending approval.",
+)
+@click.option("--note", "-n", default="", help="Optional note passed to the agents with the decision.")
+@click.option("--debug", "-d", "debug", is_flag=True, default=False, help="Enable event tracing and state inspection.")
+@click.option("--thoughts", "-t", "show_thoughts", is_flag=True, default=False, help="Show agent's inner reasoning.")
+def resume_command(
+    session_id: str,
+    approved: bool | None,
+    note: str,
+    debug: bool,
+    show_thoughts: bool,
+) -> None:
+    """Continue a run paused for human approval."""
+    if approved is None:
+        click.secho("Error: pass --approve or --reject.", **THEME["err"])
+        sys.exit(1)
+    from tools.config import RESUMABLE
+
+    if not RESUMABLE:
+        click.secho("Error: this project is not resumable (AGENT_RESUMABLE is not true).", **THEME["err"])
+        sys.exit(1)
+    from tools.approvals import APPROVAL_STATE_KEY, approval_message, clear_pending, load_pending
+    from tools.runner_utils import resume_agent_stream
+
+    record = load_pending(session_id)
+    if record is None:
+        click.secho(f"Error: no pending approval for session {session_id}.", **THEME["err"])
+        sys.exit(1)
+
+    root_agent, _ = _prepare_agents(debug, show_thoughts)
+    app = _build_app(root_agent)
+    decision = {"status": "approved" if approved else "rejected", "note": note}
+
+    try:
+        final_text = asyncio.run(
+            resume_agent_stream(
+                app,
+                record["user_id"],
+                session_id,
+                record["invocation_id"],
+                approval_message(record, approved, note),
+                state_delta={APPROVAL_STATE_KEY: decision},
+                debug=debug,
+            )
+        )
+        clear_pending(session_id, record["function_call_id"])
+        flush_traces()
+        click.echo(f"\n{final_text}")
+        _echo_pending(_pending_record(session_id))
+    except Exception as e:
+        click.secho(f"\n[System Failure]: {e}", **THEME["err"])
+        if debug:
+            import traceback
+            traceback.print_exc()
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     cli()
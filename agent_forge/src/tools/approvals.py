@@ -0,0 +1,116 @@
+"""
+Pending-approval records for the human_in_the_loop pattern.
+
+The approval gate calls request_approval (a long-running tool). With a
+resumable App, ADK pauses the invocation right after that call, so nothing
+stays in memory while a human decides: the session lives in the session DB
+and a small JSON record here says how to resume it.
+
+`python main.py pending` lists records; `python main.py resume --session <id>
+--approve|--reject` answers the call and continues the paused invocation.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import LongRunningFunctionTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+APPROVALS_DIR = Path(
+    os.getenv("APPROVALS_DIR", Path(os.getcwd()) / "pending_approvals")
+)
+
+# Session state key the resume command sets with the human's decision
+APPROVAL_STATE_KEY = "approval"
+
+
+def _record_path(session_id: str) -> Path:
+    return APPROVALS_DIR / f"{session_id}.json"
+
+
+def save_pending(record: dict) -> None:
+    APPROVALS_DIR.mkdir(parents=True, exist_ok=True)
+    path = _record_path(record["session_id"])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(record, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_pending(session_id: str) -> dict | None:
+    path = _record_path(session_id)
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def list_pending() -> list[dict]:
+    if not APPROVALS_DIR.is_dir():
+        return []
+    return sorted(
+        (
+            json.loads(p.read_text(encoding="utf-8"))
+            for p in APPROVALS_DIR.glob("*.json")
+        ),
+        key=lambda r: r["created_at"],
+    )
+
+
+def clear_pending(session_id: str, function_call_id: str) -> None:
+    """Remove the record, unless the resumed run already replaced it with a new request."""
+    record = load_pending(session_id)
+    if record and record["function_call_id"] == function_call_id:
+        _record_path(session_id).unlink()
+
+
+def request_approval(summary: str, tool_context: ToolContext) -> dict:
+    """
+    Submit the proposed action for human approval. The run pauses until a
+    human approves or rejects it; do not call this again after it returns.
+    Args:
+        summary: What needs approval, including amount, payee, and reason.
+    """
+    record = {
+        "session_id": tool_context.session.id,
+        "user_id": tool_context.user_id,
+        "invocation_id": tool_context.invocation_id,
+        "function_call_id": tool_context.function_call_id,
+        "tool_name": "request_approval",
+        "agent": tool_context.agent_name,
+        "summary": summary,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    save_pending(record)
+    return {"status": "pending", "session_id": record["session_id"]}
+
+
+request_approval_tool = LongRunningFunctionTool(func=request_approval)
+
+
+def approval_message(record: dict, approved: bool, note: str = "") -> types.Content:
+    """The human's answer to the paused request_approval call."""
+    response = types.FunctionResponse(
+        id=record["function_call_id"],
+        name=record["tool_name"],
+        response={"status": "approved" if approved else "rejected", "note": note},
+    )
+    return types.Content(role="user", parts=[types.Part(function_response=response)])
+
+
+def require_approval(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: skip the agent unless a human approved this session."""
+    decision = callback_context.state.get(APPROVAL_STATE_KEY) or {}
+    if decision.get("status") == "approved":
+        return None
+    return types.Content(
+        role="model",
+        parts=[
+            types.Part(
+                text=f"Skipped {callback_context.agent_name}: not approved ({decision.get('status', 'no decision')})."
+            )
+        ],
+    )
@@ -0,0 +1,149 @@
+"""
+Batch input for staged (hierarchical) pipelines (spec: batch_input: true).
+
+The user pastes many items at once (e.g. 200 resumes), separated by lines of
+'---' or as a JSON list. BatchScreener splits them into chunks that fit the
+model context, runs the screening agent once per chunk, and merges the
+structured shortlists. Only shortlisted items reach the later, more expensive
+stages, so cost scales with the shortlist rather than the batch.
+"""
+
+import json
+import re
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+
+from .loop_utils import agent_event
+
+# Session state keys
+CHUNK_KEY = (
+    "batch_chunk"  # the screener's current chunk ({batch_chunk} in its instruction)
+)
+SHORTLIST_KEY = "shortlist"  # merged shortlist entries, best first
+SHORTLISTED_KEY = (
+    "shortlisted_candidates"  # full text of shortlisted items, for later stages
+)
+
+_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+
+
+def split_items(text: str) -> list[str]:
+    """A JSON list (strings or objects), else '---'-separated blocks of text."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, list):
+        return [item if isinstance(item, str) else json.dumps(item) for item in data]
+    return [block.strip() for block in _SEPARATOR.split(text) if block.strip()]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough for chunk sizing."""
+    return len(text) // 4 + 1
+
+
+def chunk_items(items: dict[str, str], chunk_tokens: int) -> list[dict[str, str]]:
+    """Pack {id: text} greedily into chunks of at most chunk_tokens; an oversized item gets its own."""
+    chunks: list[dict[str, str]] = []
+    current: dict[str, str] = {}
+    used = 0
+    for item_id, text in items.items():
+        cost = estimate_tokens(text)
+        if current and used + cost > chunk_tokens:
+            chunks.append(current)
+            current, used = {}, 0
+        current[item_id] = text
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def format_items(items: dict[str, str]) -> str:
+    return "\n\n".join(f"[{item_id}]\n{text}" for item_id, text in items.items())
+
+
+class BatchScreener(BaseAgent):
+    """
+    Runs its single sub-agent (the screener) once per chunk of the user's batch.
+    The screener must use include_contents="none", read {batch_chunk} in its
+    instruction, and set output_schema=ScreeningResult with an output_key.
+    """
+
+    chunk_tokens: int = 20000
+    max_shortlist: int = 10
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        screener = self.sub_agents[0]
+        parts = (
+            ctx.user_content.parts
+            if ctx.user_content and ctx.user_content.parts
+            else []
+        )
+        items = {
+            f"c{i}": text
+            for i, text in enumerate(
+                split_items("\n".join(p.text for p in parts if p.text)), 1
+            )
+        }
+        chunks = chunk_items(items, self.chunk_tokens)
+
+        shortlisted: dict[str, dict] = {}
+        for n, chunk in enumerate(chunks, 1):
+            # A short progress reply starts the screener's turn, so it sees only this chunk.
+            yield agent_event(
+                self,
+                ctx,
+                f"Screening batch {n}/{len(chunks)} ({len(chunk)} of {len(items)} candidates).",
+                {CHUNK_KEY: format_items(chunk)},
+            )
+            async for event in screener.run_async(ctx):
+                yield event
+            result = ctx.session.state.get(screener.output_key) or {}
+            for entry in result.get("shortlist", []):
+                if entry.get("candidate_id") in chunk:
+                    shortlisted[entry["candidate_id"]] = entry
+
+        shortlist = sorted(
+            shortlisted.values(), key=lambda e: e.get("score", 0), reverse=True
+        )
+        shortlist = shortlist[: self.max_shortlist]
+        lines = [
+            f"- {e['candidate_id']} {e.get('name', '')} ({e.get('score', 0)}): {e.get('reason', '')}"
+            for e in shortlist
+        ]
+        summary = f"Shortlisted {len(shortlist)} of {len(items)} candidates."
+        yield agent_event(
+            self,
+            ctx,
+            "\n".join([summary, *lines]),
+            {
+                CHUNK_KEY: "",
+                SHORTLIST_KEY: shortlist,
+                SHORTLISTED_KEY: format_items(
+                    {e["candidate_id"]: items[e["candidate_id"]] for e in shortlist}
+                ),
+            },
+        )
+
+
+def require_shortlist(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: skip a later stage when the screener shortlisted nobody."""
+    if callback_context.state.get(SHORTLIST_KEY):
+        return None
+    return types.Content(
+        role="model",
+        parts=[
+            types.Part(
+                text=f"Skipped {callback_context.agent_name}: no candidates were shortlisted."
+            )
+        ],
+    )
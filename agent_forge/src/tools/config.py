@@ -1,6 +1,7 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.registry import LLMRegistry
 
 load_dotenv()
 
@@ -19,11 +20,43 @@ if CLOUD_MODEL:
 else:
     # We are in Local Mode
     # Instantiate the wrapper for the Agent, but keep the name for the Logger
+    # (imported here so cloud-only projects can be generated without litellm)
+    from google.adk.models.lite_llm import LiteLlm
+
     AI_MODEL = LiteLlm(model=LOCAL_MODEL)
     AI_MODEL_NAME = f"local:{LOCAL_MODEL}"
     LOCAL_LLM = True
 
+
+@lru_cache(maxsize=None)
+def get_model(model: str):
+    """One shared model object per model string: ADK-registered names (gemini-*) or LiteLLM."""
+    try:
+        return LLMRegistry.new_llm(model)
+    except ValueError:
+        from google.adk.models.lite_llm import LiteLlm
+
+        return LiteLlm(model=model)
+
+
+def resolve_model(model: str | None = None, tier: str | None = None):
+    """
+    Per-agent model selection (spec sub_agents[].model / .tier):
+    explicit model string, else AI_MODEL_<TIER> from .env, else the global AI_MODEL.
+    """
+    if model:
+        return get_model(model)
+    if tier:
+        tier_model = os.getenv(f"AI_MODEL_{tier.upper()}")
+        if tier_model:
+            return get_model(tier_model)
+    return AI_MODEL
+
+
 INCLUDE_THOUGHTS = os.getenv("INCLUDE_THOUGHTS", "false").lower() == "true"
 
+# Resumable apps pause on long-running tool calls (e.g. human approval) and resume later
+RESUMABLE = os.getenv("AGENT_RESUMABLE", "false").lower() == "true"
+
 ROOT_AGENT = os.getenv("ROOT_AGENT", "SET_ROOT_AGENT_NAME_HERE")
 SUB_AGENTS = [s.strip() for s in os.getenv("SUB_AGENTS", "SUB_AGENT_1,SUB_AGENT_2,SUB_AGENT_3").strip().split(",")]
@@ -0,0 +1,128 @@
+"""
+Warm daemon for main.py.
+
+`python main.py daemon` loads ADK, the agents, the App and the session service
+once and serves requests on a Unix socket. `python main.py run` connects to it
+when it is running, so each query skips the multi-second import cost.
+
+Wire format: newline-delimited JSON. The client sends one request line; the
+daemon answers with {"type": "event", ...} lines while the run progresses and
+ends with one {"type": "final", ...} or {"type": "error", ...} line.
+
+The client side uses only the standard library (plus python-dotenv) so it
+stays fast to import; keep ADK imports out of this module.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(os.getcwd()) / ".env")
+
+# Requests carry the whole user input on one line (e.g. a pasted batch)
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+
+def socket_path() -> Path:
+    """AGENT_SOCKET, else a per-app, per-project path in the temp dir (Unix socket paths are short)."""
+    explicit = os.getenv("AGENT_SOCKET")
+    if explicit:
+        return Path(explicit)
+    app = os.getenv("AGENT_APP_NAME", "noname_app")
+    project = hashlib.sha256(os.getcwd().encode("utf-8")).hexdigest()[:8]
+    return Path(tempfile.gettempdir()) / f"adk-{app}-{project}.sock"
+
+
+def is_running(path: Path) -> bool:
+    if not path.exists():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def request(path: Path, payload: dict) -> Iterator[dict]:
+    """Send one request and yield the daemon's reply messages as they arrive."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(path))
+        s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with s.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                yield json.loads(line)
+
+
+def event_summary(event) -> dict:
+    """The parts of an ADK event the client displays."""
+    parts = event.content.parts if event.content and event.content.parts else []
+    return {
+        "type": "event",
+        "author": event.author,
+        "partial": bool(event.partial),
+        "text": "".join(p.text for p in parts if p.text and not p.thought),
+        "thought": "".join(p.text for p in parts if p.text and p.thought),
+        "calls": [
+            {"name": p.function_call.name, "args": p.function_call.args}
+            for p in parts
+            if p.function_call
+        ],
+        "results": [
+            {"name": p.function_response.name, "response": p.function_response.response}
+            for p in parts
+            if p.function_response
+        ],
+    }
+
+
+Send = Callable[[dict], Awaitable[None]]
+
+
+async def serve(handler: Callable[[dict, Send], Awaitable[None]], path: Path) -> None:
+    """
+    Serve requests on path until cancelled. handler(request, send) runs once per
+    connection; connections are handled concurrently.
+    """
+    if is_running(path):
+        raise SystemExit(f"A daemon is already listening on {path}.")
+    path.unlink(missing_ok=True)  # stale socket from a daemon that did not exit cleanly
+
+    async def on_client(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        async def send(message: dict) -> None:
+            writer.write((json.dumps(message, default=str) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            await handler(json.loads(await reader.readline()), send)
+        except Exception as e:
+            try:
+                await send({"type": "error", "kind": "system", "message": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(
+        on_client, path=str(path), limit=MAX_LINE_BYTES
+    )
+    os.chmod(path, 0o600)
+    # Stop cleanly (and remove the socket) on SIGTERM as well as Ctrl-C
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass  # server closed (SIGTERM) or the loop was interrupted
+    finally:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,193 @@
+"""
+Minimal HTTP/1.1 front end for `main.py serve` (standard library only).
+
+POST /run with {"input": "..."} runs the agent in its own session and answers
+{"session_id": ..., "text": ..., "pending": ...}; GET /health reports load.
+
+At most max_concurrency runs execute at once and up to max_queue more wait
+for a slot. Beyond that, requests get 503 with Retry-After, so callers back
+off instead of piling up behind a slow model.
+
+One request per connection (Connection: close); put a reverse proxy in front
+for TLS or keep-alive.
+"""
+
+import asyncio
+import json
+import signal
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable
+
+from .logging_utils import logger
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+HEADER_TIMEOUT_S = 30
+RETRY_AFTER_S = 1
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Gate:
+    """Concurrency limit plus a bounded wait queue (backpressure)."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.running = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise HttpError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Server busy: queue is full, retry later.",
+            )
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    """(method, path, body) of one request."""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line.") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.") from None
+    if length > MAX_BODY_BYTES:
+        raise HttpError(
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body exceeds {MAX_BODY_BYTES} bytes."
+        )
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+def _parse_run_request(body: bytes) -> dict:
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be JSON.") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("input"), str):
+        raise HttpError(
+            HTTPStatus.BAD_REQUEST, 'Body must be a JSON object with a string "input".'
+        )
+    return payload
+
+
+async def _respond(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    payload: dict,
+    headers: tuple[str, ...] = (),
+) -> None:
+    body = json.dumps(payload, default=str).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+        *headers,
+    ]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(
+    handler: Handler, host: str, port: int, max_concurrency: int, max_queue: int
+) -> None:
+    """
+    Serve until cancelled (Ctrl-C or SIGTERM). handler(request) runs one agent
+    invocation and returns the JSON reply; a ValueError from it is a 400.
+    """
+    gate = Gate(max_concurrency, max_queue)
+
+    async def dispatch(method: str, path: str, body: bytes) -> dict:
+        if path == "/health":
+            if method != "GET":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET /health.")
+            return {"status": "ok", **gate.stats()}
+        if path != "/run":
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {path}.")
+        if method != "POST":
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST /run.")
+        request = _parse_run_request(body)
+        async with gate.slot():
+            try:
+                return await handler(request)
+            except ValueError as ve:
+                raise HttpError(HTTPStatus.BAD_REQUEST, str(ve)) from None
+
+    async def on_client(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            method, path = "?", "?"
+            try:
+                method, path, body = await asyncio.wait_for(
+                    _read_request(reader), HEADER_TIMEOUT_S
+                )
+                await _respond(
+                    writer, HTTPStatus.OK, await dispatch(method, path, body)
+                )
+            except HttpError as he:
+                retry = (
+                    (f"Retry-After: {RETRY_AFTER_S}",)
+                    if he.status == HTTPStatus.SERVICE_UNAVAILABLE
+                    else ()
+                )
+                await _respond(writer, he.status, {"error": str(he)}, retry)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                pass  # client went away or never sent a full request
+            except Exception as e:
+                logger.error(f"{method} {path} failed: {e}")
+                await _respond(
+                    writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                )
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(on_client, host, port)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass  # server closed (SIGTERM) or the loop was interrupted
@@ -0,0 +1,240 @@
+"""
+JSONL batch runs for `main.py batch` (nightly jobs, thousands of prompts).
+
+Input: one JSON object per line, {"id": "...", "input": "..."}; "id" defaults
+to the line number and a bare JSON string is taken as the input. Lines are
+read as workers free up, so the file is never loaded whole.
+
+Output: one JSON object per finished row, appended in completion order and
+flushed as it is written:
+  {"id": ..., "status": "ok", "session_id": ..., "text": ..., "elapsed_s": ...}
+  {"id": ..., "status": "error", "error": ..., "elapsed_s": ...}
+A failed row does not stop the batch. Rerunning with the same --out skips ids
+already recorded as "ok", so an interrupted job resumes where it stopped and
+failed rows get another try (the last line for an id wins).
+
+With workers > 1 (run_sharded), rows are spread over a pool of processes,
+each with its own event loop, agents and Runner, so CPU-bound work (pydantic
+validation, event serialization, indicator math in tools) uses more than one
+core. Workers pull rows from a shared queue as they free up, so slow rows do
+not stall a fixed shard; the coordinating process is the only writer of the
+output file. Workers share the session DB (sqlite in WAL mode, see
+runner_utils.enable_wal), so `pending`/`resume` work for batch sessions too.
+
+The asyncio and JSON plumbing only: the agent call is the handler passed in.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import queue as queue_module
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator, Optional
+
+Handler = Callable[[str], Awaitable[dict]]
+OnResult = Callable[[dict], None]
+
+
+def completed_ids(out_path: Path) -> set[str]:
+    """Ids with an "ok" result in an existing output file."""
+    done: set[str] = set()
+    if not out_path.exists():
+        return done
+    with out_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # partial last line from an interrupted run
+            if isinstance(row, dict) and row.get("status") == "ok":
+                done.add(str(row.get("id")))
+    return done
+
+
+def iter_rows(in_path: Path) -> Iterator[tuple[str, Optional[str], Optional[str]]]:
+    """(id, input, error) per non-blank line; error is set for rows that cannot run."""
+    with in_path.open(encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield str(n), None, f"Invalid JSON on line {n}: {e}"
+                continue
+            if isinstance(data, str):
+                yield str(n), data, None
+            elif isinstance(data, dict) and isinstance(data.get("input"), str):
+                yield str(data.get("id", n)), data["input"], None
+            else:
+                yield (
+                    str(n),
+                    None,
+                    f'Line {n} is not a string or an object with a string "input".',
+                )
+
+
+async def _run_row(handler: Handler, row_id: str, input_text: str) -> dict:
+    start = time.perf_counter()
+    try:
+        result = {"id": row_id, "status": "ok", **await handler(input_text)}
+    except Exception as e:
+        result = {"id": row_id, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    result["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _error_row(row_id: str, error: str) -> dict:
+    return {"id": row_id, "status": "error", "error": error, "elapsed_s": 0.0}
+
+
+class _Output:
+    """Appends result rows to the output file and counts them."""
+
+    def __init__(self, f, on_result: Optional[OnResult]):
+        self.counts = {"ok": 0, "error": 0, "skipped": 0}
+        self._f = f
+        self._on_result = on_result
+
+    def record(self, row: dict) -> None:
+        self._f.write(json.dumps(row, default=str) + "\n")
+        self._f.flush()
+        self.counts[row["status"]] += 1
+        if self._on_result is not None:
+            self._on_result(row)
+
+
+async def run_batch(
+    handler: Handler,
+    in_path: Path,
+    out_path: Path,
+    concurrency: int,
+    on_result: Optional[OnResult] = None,
+) -> dict[str, int]:
+    """Run every pending row with at most `concurrency` in flight; returns counts by status."""
+    done = completed_ids(out_path)
+    # Bounded: the reader stays at most a few rows ahead of the workers
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    with out_path.open("a", encoding="utf-8") as f:
+        out = _Output(f, on_result)
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                out.record(await _run_row(handler, *item))
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for row_id, input_text, error in iter_rows(in_path):
+                if row_id in done:
+                    out.counts["skipped"] += 1
+                elif error:
+                    out.record(_error_row(row_id, error))
+                else:
+                    await queue.put((row_id, input_text))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+    return out.counts
+
+
+def _worker_process(
+    handler_factory: Callable[[], Handler], tasks, results, concurrency: int
+) -> None:
+    """Entry point of one pool process: build the agents once, then run rows until a None per slot."""
+    handler = handler_factory()
+
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        # Blocking queue reads stay off the loop, one thread per slot
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+            async def slot() -> None:
+                while True:
+                    item = await loop.run_in_executor(pool, tasks.get)
+                    if item is None:
+                        return
+                    results.put(await _run_row(handler, *item))
+
+            await asyncio.gather(*(slot() for _ in range(concurrency)))
+
+    asyncio.run(main())
+
+
+def run_sharded(
+    handler_factory: Callable[[], Handler],
+    in_path: Path,
+    out_path: Path,
+    workers: int,
+    concurrency: int,
+    on_result: Optional[OnResult] = None,
+) -> dict[str, int]:
+    """
+    run_batch across `workers` processes, each running `concurrency` rows at
+    once. handler_factory must be picklable (a module-level function or a
+    functools.partial of one); each process calls it once to build its handler.
+    """
+    done = completed_ids(out_path)
+    ctx = multiprocessing.get_context(
+        "spawn"
+    )  # no forked copies of a running loop or DB engine
+    tasks = ctx.Queue(maxsize=workers * concurrency * 2)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=_worker_process,
+            args=(handler_factory, tasks, results, concurrency),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    with out_path.open("a", encoding="utf-8") as f:
+        out = _Output(f, on_result)
+        feed = {"queued": 0, "finished": False}
+
+        def feeder() -> None:
+            for row_id, input_text, error in iter_rows(in_path):
+                if row_id in done:
+                    out.counts["skipped"] += 1
+                elif error:
+                    results.put(_error_row(row_id, error))
+                    feed["queued"] += 1
+                else:
+                    tasks.put((row_id, input_text))
+                    feed["queued"] += 1
+            for _ in range(workers * concurrency):
+                tasks.put(None)
+            feed["finished"] = True
+
+        threading.Thread(target=feeder, daemon=True).start()
+        received = 0
+        try:
+            while not (feed["finished"] and received == feed["queued"]):
+                try:
+                    out.record(results.get(timeout=1))
+                    received += 1
+                except queue_module.Empty:
+                    crashed = [p.exitcode for p in procs if p.exitcode not in (None, 0)]
+                    if crashed:
+                        raise RuntimeError(
+                            f"A batch worker exited with code {crashed[0]}; rerun to retry the unfinished rows."
+                        )
+        finally:
+            tasks.cancel_join_thread()
+            for proc in procs:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+    return out.counts
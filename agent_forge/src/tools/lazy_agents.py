@@ -0,0 +1,63 @@
+"""
+Resolve sub-agents on first use (spec: lazy_sub_agents: true).
+
+LazyAgentTool advertises a sub-agent to the coordinator model under its
+name and description, but only imports and builds the agent the first time
+the model calls it. A root with dozens of specialists then pays import and
+construction cost only for the ones a request touches.
+
+Assumes the plain AgentTool signature (a single 'request' string), which is
+what agents without an input_schema get.
+"""
+
+import importlib
+from typing import Any
+
+from google.adk.tools import AgentTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.adk.utils.variant_utils import GoogleLLMVariant
+from google.genai import types
+
+
+class LazyAgentTool(BaseTool):
+    """AgentTool for <package>.sub_agents.<name>, imported on first call."""
+
+    def __init__(self, package: str, name: str, description: str):
+        super().__init__(name=name, description=description)
+        self._module = f"{package}.sub_agents.{name}"
+        self._tool: AgentTool | None = None
+
+    @property
+    def agent(self):
+        """The sub-agent, importing it now if needed."""
+        return self._resolve().agent
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._tool is not None
+
+    def _resolve(self) -> AgentTool:
+        if self._tool is None:
+            agent = getattr(importlib.import_module(self._module), self.name)
+            self._tool = AgentTool(agent=agent)
+        return self._tool
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        declaration = types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={"request": types.Schema(type=types.Type.STRING)},
+                required=["request"],
+            ),
+        )
+        if self._api_variant != GoogleLLMVariant.GEMINI_API:
+            declaration.response = types.Schema(type=types.Type.STRING)
+        return declaration
+
+    async def run_async(
+        self, *, args: dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        return await self._resolve().run_async(args=args, tool_context=tool_context)
@@ -1,25 +1,46 @@
+import atexit
 import logging
 import json
+import os
+import queue
 import sys
+import threading
+from importlib.metadata import PackageNotFoundError, version
 import click
-import google.adk
-import litellm
 
 # Theme for consistent cross-repo observability
 THEME = {
     "thought": {"fg": "cyan", "italic": True},
     "call": {"fg": "yellow", "bold": True},
     "res": {"fg": "green"},
-    "err": {"fg": "red", "bold": True}
+    "err": {"fg": "red", "bold": True},
 }
 
 # Global Logger for this module
 logger = logging.getLogger(__name__)
 
+# Debug traces are queued and printed by a background thread, so formatting
+# big payloads (price history, search results) never stalls the event loop.
+# Each payload prints at most TRACE_MAX_BYTES, then "(+N bytes)".
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", "2048"))
+
+_trace_queue: queue.Queue = queue.Queue()
+_trace_thread: threading.Thread | None = None
+_trace_lock = threading.Lock()
+
+
+def _pkg_version(name: str) -> str:
+    """Installed version without importing the package (litellm is optional)."""
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "not installed"
+
+
 def setup_logging(debug: bool = False, model_name: str = "unknown"):
     """ADK logging configuration with version and model tracking."""
     log_level = logging.DEBUG if debug else logging.INFO
-    
+
     # base station for all logging
     logging.basicConfig(
         level=log_level,
@@ -28,15 +49,18 @@ def setup_logging(debug: bool = False, model_name: str = "unknown"):
         force=True,
     )
 
+    # imported here so THEME can be used without loading ADK (main.py daemon client)
+    import google.adk
+
     adk_ver = getattr(google.adk, "__version__", "unknown")
-    litellm_ver = getattr(litellm, "__version__", "unknown")
+    litellm_ver = _pkg_version("litellm")
 
     # --- STARTUP METADATA ---
     # This ensures every log file/stream starts with the technical context
-    logger.info("="*50)
+    logger.info("=" * 50)
     logger.info(f"SYSTEM STARTUP | Model: {model_name}")
     logger.info(f"ADK Version: {adk_ver} | LiteLLM: {litellm_ver}")
-    logger.info("="*50)
+    logger.info("=" * 50)
 
     # Mute noisy internal ADK/SQL logic
     silence = logging.DEBUG if debug else logging.WARNING
@@ -51,38 +75,158 @@ def setup_logging(debug: bool = False, model_name: str = "unknown"):
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.orm").setLevel(logging.WARNING)
-    
+
     # Mute the underlying async driver (aiosqlite)
     logging.getLogger("aiosqlite").setLevel(logging.WARNING)
 
     # 'core.py' noise from aiosqlite
     logging.getLogger("sqlite3").setLevel(logging.WARNING)
 
+
+def clip(value, max_bytes: int | None = None, indent: int | None = None) -> str:
+    """
+    value as JSON (str as is), cut to max_bytes (default TRACE_MAX_BYTES) with a
+    "(+N bytes)" marker. Encodes incrementally, so a huge payload is never held
+    as one string.
+    """
+    budget = TRACE_MAX_BYTES if max_bytes is None else max_bytes
+    if isinstance(value, str):
+        chunks = [value]
+    else:
+        chunks = json.JSONEncoder(
+            indent=indent, default=str, ensure_ascii=False
+        ).iterencode(value)
+    kept, size = [], 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if size < budget:
+            kept.append(data[: budget - size])
+        size += len(data)
+    text = b"".join(kept).decode("utf-8", errors="ignore")
+    return text if size <= budget else f"{text} ... (+{size - budget} bytes)"
+
+
+def _clip_state_value(value) -> str:
+    # Strings are quoted, as in the JSON around them
+    text = json.dumps(value, ensure_ascii=False) if isinstance(value, str) else value
+    return clip(text, indent=2).replace("\n", "\n  ")
+
+
+def _trace_worker():
+    while True:
+        render = _trace_queue.get()
+        try:
+            for text, style in render():
+                click.secho(text, **style)
+        except Exception as e:
+            click.secho(f"  ✘ [Trace Error]: {e}", **THEME["err"])
+        finally:
+            _trace_queue.task_done()
+
+
+def _trace(render):
+    """Queue render (a generator of (text, style) lines) for the trace thread."""
+    global _trace_thread
+    with _trace_lock:
+        if _trace_thread is None:
+            _trace_thread = threading.Thread(
+                target=_trace_worker, name="adk-trace", daemon=True
+            )
+            _trace_thread.start()
+    _trace_queue.put(render)
+
+
+def flush_traces():
+    """Wait until queued traces are printed (before a command prints its result)."""
+    if _trace_thread is not None:
+        _trace_queue.join()
+
+
+atexit.register(flush_traces)
+
+
 async def log_event(event):
-    """Processes ADK events for the CLI trace."""
-    if hasattr(event, 'thought') and event.thought:
-        click.secho(f"\n[Thought]: {event.thought}", **THEME["thought"])
+    """Processes ADK events for the CLI trace (printed by the trace thread)."""
+
+    def render():
+        if hasattr(event, "thought") and event.thought:
+            yield f"\n[Thought]: {clip(event.thought)}", THEME["thought"]
 
-    calls = event.get_function_calls()
-    if calls:
-        for call in calls:
-            click.secho(f"  ➜ [Tool Call]: {call.name}", **THEME["call"])
-            click.secho(f"    [Arguments]: {call.args}", fg="yellow")
+        for call in event.get_function_calls() or []:
+            yield f"  ➜ [Tool Call]: {call.name}", THEME["call"]
+            yield f"    [Arguments]: {clip(call.args)}", {"fg": "yellow"}
 
-    responses = event.get_function_responses()
-    if responses:
-        for resp in responses:
-            click.secho(f"  ✔ [Tool Result]: {resp.name} -> {resp.response}", **THEME["res"])
+        for resp in event.get_function_responses() or []:
+            yield (
+                f"  ✔ [Tool Result]: {resp.name} -> {clip(resp.response)}",
+                THEME["res"],
+            )
 
-    if hasattr(event, 'error') and event.error:
-        click.secho(f"  ✘ [Error]: {event.error}", **THEME["err"])
+        if hasattr(event, "error") and event.error:
+            yield f"  ✘ [Error]: {event.error}", THEME["err"]
+
+    _trace(render)
 
 
 def log_session_state(state: dict, label="CURRENT STATE"):
     """
-    Displays session state in a formatted way.
+    Displays session state in a formatted way (each value clipped to
+    TRACE_MAX_BYTES; printed by the trace thread).
     """
     if state:
-        state_json = json.dumps(state, indent=2)
-        click.secho(f"\n--- {label} ---", fg="magenta", bold=True)
-        click.secho(state_json, fg="magenta")
\ No newline at end of file
+        # Top-level snapshot: the run keeps updating state while this waits in the queue
+        snapshot = dict(state)
+
+        def render():
+            state_json = (
+                "{\n"
+                + ",\n".join(
+                    f"  {json.dumps(key)}: " + _clip_state_value(value)
+                    for key, value in snapshot.items()
+                )
+                + "\n}"
+            )
+            yield f"\n--- {label} ---", {"fg": "magenta", "bold": True}
+            yield state_json, {"fg": "magenta"}
+
+        _trace(render)
+
+
+def agent_children(agent) -> list:
+    """
+    agent's sub_agents plus the agents behind its AgentTools that are built:
+    lazy sub-agents (tools.lazy_agents) not called yet are skipped, not imported.
+    """
+    children = list(getattr(agent, "sub_agents", None) or [])
+    for tool in getattr(agent, "tools", None) or []:
+        if (
+            getattr(tool, "is_resolved", True)
+            and getattr(tool, "agent", None) is not None
+        ):
+            children.append(tool.agent)
+    return children
+
+
+def format_agent_flow_for_log(root_agent) -> str:
+    """
+    One-line map of the agent tree (children as in agent_children):
+      Sequential: root: A -> B    Parallel: P(A || B)    Other: root{A, B}
+    """
+
+    def _fmt(agent, top_level: bool) -> str:
+        name = getattr(agent, "name", agent.__class__.__name__)
+        subs = [_fmt(a, False) for a in agent_children(agent)]
+        if not subs:
+            return name
+        kind = agent.__class__.__name__
+        if kind == "SequentialAgent":
+            return (
+                f"{name}: {' -> '.join(subs)}"
+                if top_level
+                else f"{name}({' -> '.join(subs)})"
+            )
+        if kind == "ParallelAgent":
+            return f"{name}({' || '.join(subs)})"
+        return f"{name}{{{', '.join(subs)}}}"
+
+    return _fmt(root_agent, True)
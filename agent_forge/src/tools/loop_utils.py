@@ -0,0 +1,74 @@
+"""
+Loop control for LoopAgent-based patterns (iterative_refinement).
+
+Two deterministic ways out of a refinement loop, so it ends in the fewest
+LLM rounds instead of running to max_iterations:
+  - exit_loop: tool the checker calls once the draft passes.
+  - ConvergenceGuard: loop step that stops when the draft stops changing.
+
+agent_event builds the events such custom steps yield (progress text, state
+delta, escalate); SectionCritic and BatchScreener use it too.
+"""
+
+import hashlib
+import json
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+
+def exit_loop(tool_context: ToolContext) -> dict:
+    """Call this only when the draft passes every check. Ends the refinement loop."""
+    tool_context.actions.escalate = True
+    # The verdict is final: no extra LLM turn to summarize the tool result.
+    tool_context.actions.skip_summarization = True
+    return {"status": "passed"}
+
+
+def agent_event(
+    agent: BaseAgent,
+    ctx: InvocationContext,
+    text: Optional[str],
+    state_delta: dict,
+    escalate: bool = False,
+) -> Event:
+    """An event authored by a custom agent step: optional model text, state delta, escalate."""
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=agent.name,
+        branch=ctx.branch,
+        content=types.Content(role="model", parts=[types.Part(text=text)])
+        if text
+        else None,
+        actions=EventActions(escalate=escalate, state_delta=state_delta),
+    )
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ConvergenceGuard(BaseAgent):
+    """
+    Escalates when state[watch_key] is identical to the previous round of the
+    same invocation. Place it right after the drafter: an unchanged draft was
+    already rejected by the checker, so another round cannot help.
+    """
+
+    watch_key: str
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        # Keyed by invocation so a new request never matches the last one's draft.
+        # (temp: keys are not kept on the session, so a normal key is used.)
+        marker_key = f"{self.name}_last_hash"
+        marker = f"{ctx.invocation_id}:{_digest(ctx.session.state.get(self.watch_key))}"
+        converged = ctx.session.state.get(marker_key) == marker
+        yield agent_event(self, ctx, None, {marker_key: marker}, escalate=converged)
@@ -0,0 +1,73 @@
+"""
+Deterministic pre-router for the supervisor_routing pattern.
+
+keyword_router() builds a before_model_callback for the supervisor. When the
+user's message matches one of a sub-agent's route patterns, the callback
+answers the supervisor's routing turn itself with a transfer_to_agent call,
+so ADK transfers without a model round trip. No match -> the model decides.
+
+Rules see only the message that started the invocation, and only on the
+supervisor's first model call in it: when control comes back after a
+transfer, ADK replays the other agents' turns as user "For context:"
+messages, and matching those would re-fire the transfer.
+"""
+
+import logging
+import re
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.sessions.state import State
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Invocation whose first supervisor call has been through the rules (not persisted)
+ROUTED_KEY = f"{State.TEMP_PREFIX}keyword_routed"
+
+
+def _user_input_text(callback_context: CallbackContext) -> str | None:
+    """Text of the user message that started the invocation (None for e.g. a resumed function response)."""
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return None
+    return " ".join(p.text for p in content.parts if p.text) or None
+
+
+def keyword_router(routes: dict[str, list[str]]) -> Callable:
+    """
+    routes: sub-agent name -> case-insensitive regex patterns. Rules are tried
+    in order; the first match wins.
+    """
+    rules = [
+        (agent, re.compile(p, re.IGNORECASE))
+        for agent, patterns in routes.items()
+        for p in patterns
+    ]
+
+    def route(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        if callback_context.state.get(ROUTED_KEY) == callback_context.invocation_id:
+            return None
+        callback_context.state[ROUTED_KEY] = callback_context.invocation_id
+        text = _user_input_text(callback_context)
+        if not text:
+            return None
+        for agent, rule in rules:
+            if rule.search(text):
+                logger.info("Rule route -> %s (matched %r)", agent, rule.pattern)
+                callback_context.state["route"] = {"agent": agent, "rule": rule.pattern}
+                call = types.FunctionCall(
+                    name="transfer_to_agent", args={"agent_name": agent}
+                )
+                return LlmResponse(
+                    content=types.Content(
+                        role="model", parts=[types.Part(function_call=call)]
+                    )
+                )
+        return None
+
+    return route
@@ -1,14 +1,18 @@
 import uuid
 import os
+import sqlite3
+from contextlib import closing
 from pathlib import Path
 from dotenv import load_dotenv
 
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.state import State
 from google.genai import types
 
 from .config import LOCAL_LLM
 from .logging_utils import log_event, log_session_state, logger
+from .timings import instrument_session_service, recording
 
 # Load the .env relative to the project root
 load_dotenv(dotenv_path=Path(os.getcwd()) / ".env")
@@ -19,8 +23,142 @@ APP_NAME = os.getenv("AGENT_APP_NAME", "noname_app")
 DB_PATH = Path(os.getcwd()) / f"{APP_NAME}_sessions.db"
 DB_URL = f"sqlite+aiosqlite:///{DB_PATH.resolve().as_posix()}"
 
-# Singleton Session Service
-session_service = DatabaseSessionService(db_url=DB_URL)
+# SESSION_BACKEND selects the session store:
+#   "memory"  - nothing persisted, no SQLAlchemy import (one-shot runs)
+#   "sqlite"  - persisted to DB_PATH (needed to resume paused runs)
+#   a database URL, e.g. "postgresql+asyncpg://user:pw@host/db" - shared, pooled
+# Unset: "sqlite"; `main.py run` opts into "memory" for apps that are not
+# resumable (AGENT_RESUMABLE), as nothing outlives that one process.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "").strip() or "sqlite"
+if "://" not in SESSION_BACKEND:
+    SESSION_BACKEND = SESSION_BACKEND.lower()
+
+# Seconds a write waits for a lock held by another process (batch --workers)
+SQLITE_BUSY_TIMEOUT_S = 30
+
+_session_service = None
+
+
+def get_session_service():
+    """The process-wide session service, created on first use."""
+    global _session_service
+    if _session_service is None:
+        _session_service = _create_session_service()
+    return _session_service
+
+
+def _create_session_service():
+    if SESSION_BACKEND == "memory":
+        from google.adk.sessions import InMemorySessionService
+
+        return InMemorySessionService()
+
+    from google.adk.sessions import DatabaseSessionService
+
+    if SESSION_BACKEND == "sqlite":
+        return DatabaseSessionService(db_url=DB_URL, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_S})
+    if SESSION_BACKEND.startswith("sqlite"):
+        return DatabaseSessionService(db_url=SESSION_BACKEND, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_S})
+    # Server databases: keep a pool of connections open across sessions
+    return DatabaseSessionService(
+        db_url=SESSION_BACKEND,
+        pool_size=int(os.getenv("SESSION_DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("SESSION_DB_MAX_OVERFLOW", "20")),
+        pool_pre_ping=True,
+    )
+
+
+def enable_wal() -> None:
+    """
+    Put the sqlite session DB in WAL mode so several processes can share it
+    (readers no longer block the writer). The mode is stored in the DB file.
+    """
+    db_path = _sqlite_db_path()
+    if db_path is None:
+        return
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+
+
+def _sqlite_db_path() -> Path | None:
+    """The sqlite file behind SESSION_BACKEND ("sqlite" or a sqlite URL); None for other stores."""
+    if SESSION_BACKEND == "sqlite":
+        return DB_PATH
+    if not SESSION_BACKEND.startswith("sqlite"):
+        return None
+    from sqlalchemy.engine import make_url
+
+    database = make_url(SESSION_BACKEND).database
+    # No file to share for an in-memory sqlite URL
+    if not database or database == ":memory:":
+        return None
+    return Path(database)
+
+
+# app name -> the Runner of the latest App and session service under that name.
+# A new App (or service) replaces the entry, so the cache holds one Runner per
+# app name and an App built per call is not kept alive.
+_runners: dict[str, Runner] = {}
+
+
+def get_runner(app, session_service=None) -> Runner:
+    """
+    The Runner for app and session_service (default: get_session_service()),
+    built once: plugin setup and agent-tree traversal are not repeated per
+    request in long-lived callers (daemon, serve, batch, bench).
+    """
+    service = session_service or get_session_service()
+    runner = _runners.get(app.name)
+    if runner is None or runner.app is not app or runner.session_service is not service:
+        runner = Runner(app=app, session_service=service)
+        _runners[app.name] = runner
+    return runner
+
+
+async def warm_up_sessions(app_name: str, app_state: dict | None = None) -> None:
+    """
+    Create (and drop) one session before serving: the first create_session
+    inserts the app/user state rows and tables, and concurrent first calls
+    race on those inserts. app_state ("app:" keys) is stored once on the app
+    row here, so later sessions need not carry it.
+    """
+    user_id = os.getenv("USER_ID", "default_user")
+    service = get_session_service()
+    session = await service.create_session(app_name=app_name, user_id=user_id, state=app_state)
+    await service.delete_session(app_name=app_name, user_id=user_id, session_id=session.id)
+    _published_app_state[app_name] = dict(app_state or {})
+
+
+async def release_session(app_name: str, session_id: str) -> None:
+    """
+    Drop an answered request's session when sessions live in memory, so
+    long-lived callers (daemon, serve, batch) do not grow with every request.
+    Persisted sessions are kept for `pending` / `resume`.
+    """
+    if SESSION_BACKEND != "memory":
+        return
+    user_id = os.getenv("USER_ID", "default_user")
+    await get_session_service().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+
+# app_name -> app state published by this process (starting point of debug state mirrors)
+_published_app_state: dict[str, dict] = {}
+
+
+class StateMirror(dict):
+    """
+    Session state as seen by this process: a starting state plus the
+    state_delta of every event streamed past, so debug output needs no
+    get_session (which reloads the session and all its events).
+    """
+
+    def apply(self, event) -> dict:
+        """Apply a complete event's delta (partial events are not persisted); returns it."""
+        if event.partial or not event.actions or not event.actions.state_delta:
+            return {}
+        delta = {k: v for k, v in event.actions.state_delta.items() if not k.startswith(State.TEMP_PREFIX)}
+        self.update(delta)
+        return delta
 
 
 def build_user_message(text: str) -> types.Content:
@@ -40,7 +178,17 @@ def build_user_message(text: str) -> types.Content:
     return types.Content(role="user", parts=[types.Part(text=text)])
 
 
-async def execute_agent_stream(app, input_text, initial_state=None, debug=False):
+async def execute_agent_stream(
+    app,
+    input_text,
+    initial_state=None,
+    debug=False,
+    session_id=None,
+    on_event=None,
+    runner=None,
+    stream=False,
+    timings=None,
+):
     """
     (Runner Utility) Executes an agent stream with logging and state inspection.
     Args:
@@ -48,42 +196,110 @@ async def execute_agent_stream(app, input_text, initial_state=None, debug=False)
         input_text: The user input text to send to the agent.
         initial_state: The initial state to start the session with.
         debug: Whether to enable debug mode.
+        session_id: Session to create; a new uuid when omitted.
+        on_event: Optional async callable awaited with every event (e.g. to stream to a client).
+        runner: Prebuilt Runner for app; get_runner(app) when omitted.
+        stream: Ask the model for SSE streaming; partial text events reach on_event as it arrives.
+        timings: A tools.timings.Timings to record each phase of the run into (model and
+            tool calls need a TimingsPlugin on the app).
     Returns:
         The final response text.
     """
-    runner = Runner(app=app, session_service=session_service)
-    session_id = str(uuid.uuid4())
+    if timings is None:
+        return await _execute(app, input_text, initial_state, debug, session_id, on_event, runner, stream)
+    instrument_session_service(get_session_service())
+    with recording(timings):
+        return await _execute(app, input_text, initial_state, debug, session_id, on_event, runner, stream)
+
+
+async def _execute(app, input_text, initial_state, debug, session_id, on_event, runner, stream):
+    session_id = session_id or str(uuid.uuid4())
     user_id = os.getenv("USER_ID", "default_user")
 
-    await session_service.create_session(
+    await get_session_service().create_session(
         app_name=app.name,
         user_id=user_id,
         session_id=session_id,
         state=initial_state or {},
     )
+    return await _run_and_collect(
+        app,
+        user_id,
+        session_id,
+        debug,
+        on_event,
+        runner,
+        {**_published_app_state.get(app.name, {}), **(initial_state or {})},
+        new_message=build_user_message(input_text),
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE if stream else StreamingMode.NONE),
+    )
+
+
+async def resume_agent_stream(app, user_id, session_id, invocation_id, message, state_delta=None, debug=False):
+    """
+    (Runner Utility) Resumes a paused invocation (requires a resumable app).
+    Args:
+        app: The ADK app to execute.
+        user_id, session_id, invocation_id: The paused invocation.
+        message: Content answering the pending long-running call.
+        state_delta: State to apply with the message.
+        debug: Whether to enable debug mode.
+    Returns:
+        The final response text of the resumed run.
+    """
+    return await _run_and_collect(
+        app,
+        user_id,
+        session_id,
+        debug,
+        None,
+        None,
+        None,
+        new_message=message,
+        invocation_id=invocation_id,
+        state_delta=state_delta,
+    )
+
+
+async def _run_and_collect(app, user_id, session_id, debug, on_event, runner, start_state, **run_kwargs):
+    """start_state: the session's state before this run if known; else (resume) it is loaded once for debug."""
+    runner = runner or get_runner(app)
+    mirror = None
     if debug:
         # 1. Inspect STARTING state
-        curr_session = await session_service.get_session(
-            app_name=app.name,
-            user_id=user_id,
-            session_id=session_id,
-        )
-        log_session_state(curr_session.state, label="PRE-FLIGHT STATE")
+        if start_state is None:
+            curr_session = await get_session_service().get_session(
+                app_name=app.name,
+                user_id=user_id,
+                session_id=session_id,
+            )
+            start_state = curr_session.state
+        mirror = StateMirror(start_state)
+        log_session_state(mirror, label="PRE-FLIGHT STATE")
+        mirror.update(run_kwargs.get("state_delta") or {})
 
     try:
         final_text_parts = []
         async for event in runner.run_async(
             user_id=user_id,
             session_id=session_id,
-            new_message=build_user_message(input_text),
+            **run_kwargs,
         ):
             if debug:
                 await log_event(event)
+                delta = mirror.apply(event)
+                if delta:
+                    log_session_state(delta, label=f"STATE DELTA ({event.author})")
+            if on_event is not None:
+                await on_event(event)
+            # With streaming, partial chunks are followed by one complete event: keep only that
+            if event.partial:
+                continue
             if event.content and event.content.parts:
                 for part in event.content.parts:
                     if part.text:
                         final_text_parts.append(part.text)
-            
+
     except Exception as e:
         logger.error(f"Error executing agent stream: {e}")
         raise e
@@ -91,11 +307,6 @@ async def execute_agent_stream(app, input_text, initial_state=None, debug=False)
     finally:
         # Inspect FINAL state
         if debug:
-            final_session = await session_service.get_session(
-                app_name=app.name,
-                user_id=user_id,
-                session_id=session_id,
-            )
-            log_session_state(final_session.state, label="POST-FLIGHT STATE")
+            log_session_state(mirror, label="POST-FLIGHT STATE")
 
     return "".join(final_text_parts) if final_text_parts else "(no final response text)"
\ No newline at end of file
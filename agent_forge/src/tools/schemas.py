@@ -3,3 +3,39 @@ Shared/Global Schemas for the Margin Call Analyst
 """
 
 from pydantic import BaseModel, Field
+
+
+class ShortlistEntry(BaseModel):
+    candidate_id: str = Field(
+        description="The id shown in brackets before the candidate, e.g. c12."
+    )
+    name: str = Field(description="Candidate name, or 'unknown'.")
+    score: int = Field(ge=0, le=100, description="Fit for the role, 0-100.")
+    reason: str = Field(description="One sentence on why the candidate is shortlisted.")
+
+
+class ScreeningResult(BaseModel):
+    """Structured output of the screening stage (tools.batching.BatchScreener)."""
+
+    shortlist: list[ShortlistEntry] = Field(
+        default_factory=list,
+        description="Only the candidates worth an in-depth technical evaluation; may be empty.",
+    )
+
+
+class SectionVerdict(BaseModel):
+    section: str = Field(
+        description="The section heading exactly as written, without the leading #."
+    )
+    passed: bool = Field(description="True if the section needs no changes.")
+    findings: str = Field(
+        default="", description="What must change; empty when passed."
+    )
+
+
+class SectionReview(BaseModel):
+    """Structured output of the critic (tools.sections.SectionCritic)."""
+
+    verdicts: list[SectionVerdict] = Field(
+        default_factory=list, description="One verdict per changed section."
+    )
@@ -0,0 +1,171 @@
+"""
+Diff-only review for the generator_critic pattern.
+
+The generator writes a markdown document (e.g. a runbook) with one heading per
+section. SectionCritic splits each draft into sections, hashes them, and runs
+the critic on the sections that changed since they were last reviewed; for
+unchanged sections the critic only gets the cached verdict. Long documents
+then stop re-sending every unchanged section each round.
+
+Verdicts are matched to sections by heading, ignoring case, spacing, "#"
+marks and leading numbering ("2. Rollback" = "rollback"). A heading with no
+text of its own (e.g. a "# Runbook" title) is part of the section after it.
+A changed section the critic returns no verdict for stays open ("not
+reviewed") and is sent again next round.
+
+The loop ends when every section has a passing verdict, or when a revision
+changes nothing the critic has not already seen.
+"""
+
+import hashlib
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+from .loop_utils import agent_event
+
+# Session state keys
+VERDICTS_KEY = (
+    "section_verdicts"  # heading -> {"hash", "passed", "findings"} from past reviews
+)
+CHANGED_KEY = (
+    "changed_sections"  # what the critic reviews this round ({changed_sections})
+)
+UNCHANGED_KEY = (
+    "unchanged_verdicts"  # cached verdicts shown for context ({unchanged_verdicts?})
+)
+FINDINGS_KEY = "review_findings"  # open findings for the generator ({review_findings?})
+
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_NUMBERING = re.compile(r"^\d+(?:\.\d+)*[.):]?\s+")
+PREAMBLE = "(preamble)"
+
+
+def split_sections(text: str) -> dict[str, str]:
+    """
+    heading -> section text (heading line included), in document order. A
+    heading with no text before the next one opens that next section.
+    """
+    sections: dict[str, str] = {}
+    matches = list(_HEADING.finditer(text))
+    preamble = text[: matches[0].start() if matches else len(text)].strip()
+    if preamble:
+        sections[PREAMBLE] = preamble
+    start = None  # start of title-only headings carried into the next section
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        if start is None:
+            start = m.start()
+        if not text[m.end() : end].strip() and i + 1 < len(matches):
+            continue
+        title, n = m.group(1), 2
+        while title in sections:
+            title, n = f"{m.group(1)} ({n})", n + 1
+        sections[title] = text[start:end].strip()
+        start = None
+    return sections
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _heading_key(title: str) -> str:
+    """Title as the critic may echo it: case, spacing, "#" marks and numbering ignored."""
+    title = " ".join(title.lstrip("#").split()).lower()
+    return _NUMBERING.sub("", title).rstrip(":").strip()
+
+
+def _verdict_line(title: str, verdict: dict) -> str:
+    status = "PASS" if verdict["passed"] else f"FAIL: {verdict['findings']}"
+    return f"- {title}: {status}"
+
+
+def apply_review(
+    cache: dict, review: dict, changed: list[str], hashes: dict[str, str]
+) -> None:
+    """
+    Store the critic's verdicts on the changed sections in cache. Sections it
+    gave no verdict for are left as they were, so they stay changed.
+    """
+    by_key: dict[str, str] = {}
+    for title in changed:
+        by_key.setdefault(_heading_key(title), title)
+    for verdict in review.get("verdicts", []):
+        title = by_key.get(_heading_key(str(verdict.get("section", ""))))
+        if title is not None:
+            cache[title] = {
+                "hash": hashes[title],
+                "passed": bool(verdict.get("passed")),
+                "findings": verdict.get("findings", ""),
+            }
+
+
+class SectionCritic(BaseAgent):
+    """
+    Loop step wrapping the critic (its single sub-agent). The critic must use
+    include_contents="none", read {changed_sections} (and optionally
+    {unchanged_verdicts?}), and set output_schema=SectionReview with an output_key.
+    """
+
+    draft_key: str
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        critic = self.sub_agents[0]
+        state = ctx.session.state
+        sections = split_sections(str(state.get(self.draft_key) or ""))
+        hashes = {title: _hash(text) for title, text in sections.items()}
+        cache = dict(state.get(VERDICTS_KEY) or {})
+        changed = [t for t in sections if cache.get(t, {}).get("hash") != hashes[t]]
+
+        if changed:
+            unchanged = [
+                _verdict_line(t, cache[t]) for t in sections if t not in changed
+            ]
+            yield agent_event(
+                self,
+                ctx,
+                f"Reviewing {len(changed)} changed of {len(sections)} sections; {len(unchanged)} reuse cached verdicts.",
+                {
+                    CHANGED_KEY: "\n\n".join(sections[t] for t in changed),
+                    UNCHANGED_KEY: "\n".join(unchanged) or "(none)",
+                },
+            )
+            async for event in critic.run_async(ctx):
+                yield event
+            apply_review(
+                cache, ctx.session.state.get(critic.output_key) or {}, changed, hashes
+            )
+
+        unjudged = [t for t in changed if cache.get(t, {}).get("hash") != hashes[t]]
+        # Keep verdicts for current sections only
+        cache = {t: v for t, v in cache.items() if t in sections}
+        open_findings = [
+            _verdict_line(t, cache[t])
+            if cache.get(t, {}).get("hash") == hashes[t]
+            else f"- {t}: not reviewed"
+            for t in sections
+            if cache.get(t, {}).get("hash") != hashes[t]
+            or cache[t]["passed"] is not True
+        ]
+        if not sections:
+            summary = "No draft to review."
+        elif open_findings:
+            summary = "\n".join(["Open findings:", *open_findings])
+        else:
+            summary = "All sections pass."
+        yield agent_event(
+            self,
+            ctx,
+            summary,
+            {VERDICTS_KEY: cache, FINDINGS_KEY: "\n".join(open_findings) or "(none)"},
+            # Stop once everything passes, or when nothing was left to review:
+            # no verdict can change, so another round would not help. Never
+            # while a changed section still lacks a verdict.
+            escalate=not unjudged and (not open_findings or not changed),
+        )
@@ -0,0 +1,236 @@
+"""
+Per-invocation latency breakdown for `main.py run --timings / --timings-json`
+and the per-request metrics of bench.py.
+
+While a Timings collector is current (execute_agent_stream(..., timings=...)),
+every phase of the run is recorded as a span:
+  session_create  the run's create_session
+  llm             each model call, by agent (request sent to complete response)
+  tool            each tool call, by tool and calling agent (an AgentTool
+                  call includes the nested agent's run)
+  db_append       each event persisted by the session service, by author
+  other           wall time covered by no span (runner, callbacks, the CLI)
+Parallel branches overlap, so the shares of wall time can add up past 100%.
+
+Spans are tagged with the agent's path in the tree (root > parent > agent) and
+the report carries format_agent_flow_for_log, so a slow row points at the
+place in the graph to fix.
+
+The collector lives in a contextvar: concurrent runs never mix spans, and a
+run without one skips the bookkeeping.
+"""
+
+import contextvars
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from .logging_utils import agent_children, format_agent_flow_for_log
+
+_current: contextvars.ContextVar[Optional["Timings"]] = contextvars.ContextVar(
+    "adk_timings", default=None
+)
+
+
+class Timings:
+    """Spans of one invocation: (phase, name, agent, start_s, duration_s), start relative to the run."""
+
+    def __init__(self):
+        self.spans: list[tuple[str, str, str, float, float]] = []
+        self.wall_s = 0.0
+        self._origin = time.perf_counter()
+
+    def start(self) -> None:
+        self._origin = time.perf_counter()
+
+    def stop(self) -> None:
+        self.wall_s = time.perf_counter() - self._origin
+
+    def add(self, phase: str, name: str, agent: str, started: float) -> None:
+        """Record a span that began at perf_counter() value `started` and ends now."""
+        now = time.perf_counter()
+        self.spans.append((phase, name, agent, started - self._origin, now - started))
+
+    def _other_s(self) -> float:
+        """Wall time inside no span (union of the intervals, so overlaps count once)."""
+        covered, reach = 0.0, 0.0
+        for start, duration in sorted((s[3], s[4]) for s in self.spans):
+            end = start + duration
+            if end > reach:
+                covered += end - max(start, reach)
+                reach = end
+        return max(self.wall_s - covered, 0.0)
+
+    def report(self, root_agent) -> dict:
+        """JSON-ready breakdown: rows ranked by total time, plus every span."""
+        paths = agent_paths(root_agent)
+        grouped: dict[tuple[str, str, str], list[float]] = defaultdict(list)
+        for phase, name, agent, _, duration in self.spans:
+            grouped[(phase, name, paths.get(agent, agent))].append(duration)
+        grouped[("other", "-", "-")] = [self._other_s()]
+        wall_ms = self.wall_s * 1000
+        rows = [
+            {
+                "phase": phase,
+                "name": name,
+                "agent": agent,
+                "calls": len(durations) if phase != "other" else 0,
+                "total_ms": round(sum(durations) * 1000, 2),
+                "mean_ms": round(sum(durations) * 1000 / len(durations), 2),
+                "max_ms": round(max(durations) * 1000, 2),
+                "pct_wall": round(sum(durations) * 100_000 / wall_ms, 1)
+                if wall_ms
+                else 0.0,
+            }
+            for (phase, name, agent), durations in grouped.items()
+        ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return {
+            "flow": format_agent_flow_for_log(root_agent),
+            "wall_ms": round(wall_ms, 2),
+            "breakdown": rows,
+            "spans": [
+                {
+                    "phase": phase,
+                    "name": name,
+                    "agent": paths.get(agent, agent),
+                    "start_ms": round(start * 1000, 2),
+                    "duration_ms": round(duration * 1000, 2),
+                }
+                for phase, name, agent, start, duration in self.spans
+            ],
+        }
+
+
+def agent_paths(root_agent) -> dict[str, str]:
+    """Agent name -> "root > parent > name", through sub_agents and built AgentTools."""
+    paths: dict[str, str] = {}
+
+    def walk(agent, prefix: str) -> None:
+        path = f"{prefix} > {agent.name}" if prefix else agent.name
+        paths.setdefault(agent.name, path)
+        for child in agent_children(agent):
+            walk(child, path)
+
+    walk(root_agent, "")
+    return paths
+
+
+def format_report(report: dict) -> list[str]:
+    """The breakdown as table lines, slowest first."""
+    rows = report["breakdown"]
+    name_w = max(len("name"), *(len(r["name"]) for r in rows))
+    agent_w = max(len("agent"), *(len(r["agent"]) for r in rows))
+    lines = [
+        f"flow: {report['flow']}",
+        f"  {'phase':<15}{'name':<{name_w + 2}}{'agent':<{agent_w + 2}}"
+        f"{'calls':>6}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'% wall':>8}",
+    ]
+    for r in rows:
+        calls = r["calls"] if r["phase"] != "other" else ""
+        lines.append(
+            f"  {r['phase']:<15}{r['name']:<{name_w + 2}}{r['agent']:<{agent_w + 2}}"
+            f"{calls:>6}{r['total_ms']:>11.1f}{r['mean_ms']:>10.1f}{r['max_ms']:>10.1f}{r['pct_wall']:>7.1f}%"
+        )
+    lines.append(
+        f"  wall {report['wall_ms']:.1f} ms (parallel branches overlap; AgentTool calls include nested runs)"
+    )
+    return lines
+
+
+@contextmanager
+def recording(timings: Timings) -> Iterator[Timings]:
+    """Make timings the current collector for the block, which is its wall time."""
+    token = _current.set(timings)
+    timings.start()
+    try:
+        yield timings
+    finally:
+        timings.stop()
+        _current.reset(token)
+
+
+def _timed(method, phase: str, label):
+    async def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return await method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            name, agent = label(kwargs)
+            timings.add(phase, name, agent, started)
+
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_session_service(service) -> None:
+    """Time create_session and append_event for the current collector (idempotent)."""
+    if getattr(service.append_event, "timed", False):
+        return
+    service.create_session = _timed(
+        service.create_session, "session_create", lambda kw: ("-", "-")
+    )
+    service.append_event = _timed(
+        service.append_event,
+        "db_append",
+        lambda kw: ("-", getattr(kw.get("event"), "author", "-")),
+    )
+
+
+class TimingsPlugin(BasePlugin):
+    """Records model and tool calls into the current collector (add to the App's plugins)."""
+
+    def __init__(self):
+        super().__init__(name="timings")
+        self._started: dict[tuple, float] = {}
+
+    @staticmethod
+    def _model_key(callback_context) -> tuple:
+        return ("llm", callback_context.invocation_id, callback_context.agent_name)
+
+    def _end_model(self, callback_context) -> None:
+        started = self._started.pop(self._model_key(callback_context), None)
+        timings = _current.get()
+        if started is not None and timings is not None:
+            agent = callback_context.agent_name
+            timings.add("llm", agent, agent, started)
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        if _current.get() is not None:
+            self._started[self._model_key(callback_context)] = time.perf_counter()
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        # Streaming calls this per chunk; the call ends with the complete response
+        if not llm_response.partial:
+            self._end_model(callback_context)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._end_model(callback_context)
+        return None
+
+    def _end_tool(self, tool, tool_context) -> None:
+        started = self._started.pop(("tool", tool_context.function_call_id), None)
+        timings = _current.get()
+        if started is not None and timings is not None:
+            timings.add("tool", tool.name, tool_context.agent_name, started)
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if _current.get() is not None:
+            self._started[("tool", tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._end_tool(tool, tool_context)
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._end_tool(tool, tool_context)
+        return None